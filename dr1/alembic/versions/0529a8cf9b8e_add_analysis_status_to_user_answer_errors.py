@@ -0,0 +1,27 @@
+"""add analysis_status to user_answer_errors
+
+Revision ID: 0529a8cf9b8e
+Revises: d191de28ba54
+Create Date: 2026-10-18 11:21:37.402815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0529a8cf9b8e'
+down_revision: Union[str, None] = 'd191de28ba54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_answer_errors', sa.Column('analysis_status', sa.String(), nullable=False, server_default='done'))
+    op.create_index('ix_user_answer_errors_pending', 'user_answer_errors', ['id'], unique=False, postgresql_where=sa.text("analysis_status = 'pending'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_answer_errors_pending', table_name='user_answer_errors')
+    op.drop_column('user_answer_errors', 'analysis_status')
@@ -0,0 +1,45 @@
+"""add last_review_at to user_card_reviews
+
+Revision ID: 0769acad9ada
+Revises: 4e27729dc605
+Create Date: 2026-10-18 16:31:09.927113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0769acad9ada'
+down_revision: Union[str, None] = '4e27729dc605'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column('user_card_reviews', sa.Column('last_review_at', sa.DateTime(timezone=True), nullable=True))
+
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        max_id = conn.execute(
+            sa.text("SELECT max(id) FROM (SELECT id FROM user_card_reviews WHERE id > :last_id ORDER BY id LIMIT :limit) batch"),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).scalar()
+        if max_id is None:
+            break
+        conn.execute(
+            sa.text(
+                "UPDATE user_card_reviews SET last_review_at = (card_json->>'last_review')::timestamptz "
+                "WHERE id > :last_id AND id <= :max_id AND card_json->>'last_review' IS NOT NULL"
+            ),
+            {"last_id": last_id, "max_id": max_id}
+        )
+        last_id = max_id
+
+
+def downgrade() -> None:
+    op.drop_column('user_card_reviews', 'last_review_at')
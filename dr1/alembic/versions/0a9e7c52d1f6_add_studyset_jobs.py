@@ -0,0 +1,46 @@
+"""add studyset_jobs
+
+Revision ID: 0a9e7c52d1f6
+Revises: f3c8d0a6b214
+Create Date: 2026-10-18 20:34:11.580236
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '0a9e7c52d1f6'
+down_revision: Union[str, None] = 'f3c8d0a6b214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('studyset_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('mode', sa.String(), server_default='ga', nullable=False),
+    sa.Column('params', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+    sa.Column('status', sa.String(), server_default='pending', nullable=False),
+    sa.Column('study_set_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['study_set_id'], ['user_study_sets.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_studyset_jobs_id'), 'studyset_jobs', ['id'], unique=False)
+    op.create_index('uq_studyset_jobs_active_user', 'studyset_jobs', ['user_id'], unique=True, postgresql_where=sa.text("status IN ('pending', 'running')"))
+
+
+def downgrade() -> None:
+    op.drop_index('uq_studyset_jobs_active_user', table_name='studyset_jobs', postgresql_where=sa.text("status IN ('pending', 'running')"))
+    op.drop_index(op.f('ix_studyset_jobs_id'), table_name='studyset_jobs')
+    op.drop_table('studyset_jobs')
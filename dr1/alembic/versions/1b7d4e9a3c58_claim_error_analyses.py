@@ -0,0 +1,38 @@
+"""claim error analyses with attempts and a lease
+
+Revision ID: 1b7d4e9a3c58
+Revises: 0a9e7c52d1f6
+Create Date: 2026-10-18 21:04:37.218904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '1b7d4e9a3c58'
+down_revision: Union[str, None] = '0a9e7c52d1f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_answer_errors', sa.Column('analysis_attempts', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('user_answer_errors', sa.Column('analysis_claimed_at', sa.DateTime(timezone=True), nullable=True))
+    op.drop_index('ix_user_answer_errors_pending', table_name='user_answer_errors')
+    op.create_index(
+        'ix_user_answer_errors_pending', 'user_answer_errors', ['id'], unique=False,
+        postgresql_where=sa.text("analysis_status IN ('pending', 'running')")
+    )
+
+
+def downgrade() -> None:
+    op.execute("UPDATE user_answer_errors SET analysis_status = 'pending' WHERE analysis_status IN ('running', 'failed')")
+    op.drop_index('ix_user_answer_errors_pending', table_name='user_answer_errors')
+    op.create_index(
+        'ix_user_answer_errors_pending', 'user_answer_errors', ['id'], unique=False,
+        postgresql_where=sa.text("analysis_status = 'pending'")
+    )
+    op.drop_column('user_answer_errors', 'analysis_claimed_at')
+    op.drop_column('user_answer_errors', 'analysis_attempts')
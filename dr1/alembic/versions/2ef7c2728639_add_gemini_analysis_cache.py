@@ -0,0 +1,38 @@
+"""add gemini_analysis_cache
+
+Revision ID: 2ef7c2728639
+Revises: 0529a8cf9b8e
+Create Date: 2026-10-18 12:02:55.871364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '2ef7c2728639'
+down_revision: Union[str, None] = '0529a8cf9b8e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('gemini_analysis_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('correct_answer_key', sa.String(), nullable=False),
+    sa.Column('user_answer_key', sa.String(), nullable=False),
+    sa.Column('error_analysis', sa.String(), nullable=False),
+    sa.Column('brief_explanation', sa.String(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('correct_answer_key', 'user_answer_key', name='uq_gemini_analysis_cache_key')
+    )
+    op.create_index(op.f('ix_gemini_analysis_cache_id'), 'gemini_analysis_cache', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_gemini_analysis_cache_id'), table_name='gemini_analysis_cache')
+    op.drop_table('gemini_analysis_cache')
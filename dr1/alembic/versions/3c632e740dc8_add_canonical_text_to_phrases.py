@@ -0,0 +1,53 @@
+"""add canonical_text and canonical_text_normalized to phrases
+
+Revision ID: 3c632e740dc8
+Revises: 2ef7c2728639
+Create Date: 2026-10-18 13:40:18.220476
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3c632e740dc8'
+down_revision: Union[str, None] = '2ef7c2728639'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column('phrases', sa.Column('canonical_text', sa.String(), nullable=True))
+    op.add_column('phrases', sa.Column('canonical_text_normalized', sa.String(), nullable=True))
+
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        ids = [row.id for row in conn.execute(
+            sa.text("SELECT id FROM phrases WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        )]
+        if not ids:
+            break
+        conn.execute(
+            sa.text(
+                "UPDATE phrases p SET canonical_text = t.canonical_text, "
+                "canonical_text_normalized = lower(regexp_replace(trim(t.canonical_text), '\\s+', ' ', 'g')) "
+                "FROM ("
+                "SELECT pc.phrase_id, string_agg(w.text, ' ' ORDER BY pc.\"order\") AS canonical_text "
+                "FROM phrase_components pc JOIN words w ON w.id = pc.word_id "
+                "WHERE pc.phrase_id = ANY(:ids) AND w.text IS NOT NULL AND w.text <> '' "
+                "GROUP BY pc.phrase_id"
+                ") t WHERE p.id = t.phrase_id"
+            ),
+            {"ids": ids}
+        )
+        last_id = ids[-1]
+
+
+def downgrade() -> None:
+    op.drop_column('phrases', 'canonical_text_normalized')
+    op.drop_column('phrases', 'canonical_text')
@@ -0,0 +1,116 @@
+"""one user_card_reviews row per user item, partitioned user_answer_attempts
+
+Revision ID: 4e27729dc605
+Revises: 3c632e740dc8
+Create Date: 2026-10-18 15:08:51.664310
+
+"""
+from typing import Sequence, Union
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '4e27729dc605'
+down_revision: Union[str, None] = '3c632e740dc8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+MONTHS_AHEAD = 12
+BACKUP_TABLE = "user_card_reviews_removed_duplicates"
+
+
+def _month_start(year, month):
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return date(year, month, 1)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    op.execute(
+        "CREATE TABLE user_answer_attempts ("
+        "id BIGSERIAL NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "user_id INTEGER NOT NULL REFERENCES users (id), "
+        "item_type VARCHAR NOT NULL, "
+        "item_id INTEGER NOT NULL, "
+        "answer VARCHAR, "
+        "is_correct BOOLEAN NOT NULL, "
+        "PRIMARY KEY (id, created_at)"
+        ") PARTITION BY RANGE (created_at)"
+    )
+    op.create_index('ix_user_answer_attempts_user_item', 'user_answer_attempts', ['user_id', 'item_type', 'item_id'], unique=False)
+
+    first = conn.execute(sa.text("SELECT min(created_at) FROM user_card_reviews")).scalar() or date.today()
+    today = date.today()
+    start = _month_start(first.year, first.month)
+    last = _month_start(today.year, today.month + MONTHS_AHEAD)
+    while start <= last:
+        end = _month_start(start.year, start.month + 1)
+        op.execute(
+            f"CREATE TABLE user_answer_attempts_y{start.year}m{start.month:02d} PARTITION OF user_answer_attempts "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+    op.execute("CREATE TABLE user_answer_attempts_default PARTITION OF user_answer_attempts DEFAULT")
+
+    last_id = 0
+    while True:
+        max_id = conn.execute(
+            sa.text("SELECT max(id) FROM (SELECT id FROM user_card_reviews WHERE id > :last_id ORDER BY id LIMIT :limit) batch"),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).scalar()
+        if max_id is None:
+            break
+        conn.execute(
+            sa.text(
+                "INSERT INTO user_answer_attempts (created_at, user_id, item_type, item_id, answer, is_correct) "
+                "SELECT COALESCE(created_at, now()), user_id, item_type, item_id, last_answer, COALESCE(last_result, false) "
+                "FROM user_card_reviews WHERE id > :last_id AND id <= :max_id AND last_answer IS NOT NULL"
+            ),
+            {"last_id": last_id, "max_id": max_id}
+        )
+        last_id = max_id
+
+    op.execute(
+        "CREATE TEMP TABLE card_keepers ON COMMIT DROP AS "
+        "SELECT DISTINCT ON (user_id, item_type, item_id) id, user_id, item_type, item_id "
+        "FROM user_card_reviews "
+        "ORDER BY user_id, item_type, item_id, (card_json <> '{}'::jsonb) DESC, updated_at DESC NULLS LAST, id DESC"
+    )
+    op.execute(
+        "CREATE TEMP TABLE card_merged ON COMMIT DROP AS "
+        "SELECT DISTINCT ON (user_id, item_type, item_id) user_id, item_type, item_id, last_answer, "
+        "bool_or(COALESCE(is_review, false)) OVER w AS any_review, min(created_at) OVER w AS first_created "
+        "FROM user_card_reviews "
+        "WINDOW w AS (PARTITION BY user_id, item_type, item_id) "
+        "ORDER BY user_id, item_type, item_id, created_at DESC NULLS LAST, id DESC"
+    )
+    op.execute(
+        "UPDATE user_card_reviews r SET is_review = m.any_review, created_at = m.first_created, "
+        "last_answer = COALESCE(m.last_answer, r.last_answer) "
+        "FROM card_keepers k JOIN card_merged m "
+        "ON m.user_id = k.user_id AND m.item_type = k.item_type AND m.item_id = k.item_id "
+        "WHERE r.id = k.id"
+    )
+    op.execute(
+        f"CREATE TABLE {BACKUP_TABLE} AS SELECT r.* FROM user_card_reviews r "
+        "WHERE NOT EXISTS (SELECT 1 FROM card_keepers k WHERE k.id = r.id)"
+    )
+    op.execute("DELETE FROM user_card_reviews r WHERE NOT EXISTS (SELECT 1 FROM card_keepers k WHERE k.id = r.id)")
+    op.create_unique_constraint('uq_user_card_reviews_user_item', 'user_card_reviews', ['user_id', 'item_type', 'item_id'])
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table(BACKUP_TABLE):
+        raise RuntimeError(
+            f"{BACKUP_TABLE} is missing: this database was deduplicated without a backup, "
+            "so the removed user_card_reviews rows cannot be restored"
+        )
+    op.drop_constraint('uq_user_card_reviews_user_item', 'user_card_reviews', type_='unique')
+    op.execute(f"INSERT INTO user_card_reviews SELECT * FROM {BACKUP_TABLE}")
+    op.execute(f"DROP TABLE {BACKUP_TABLE}")
+    op.execute("DROP TABLE user_answer_attempts CASCADE")
@@ -0,0 +1,28 @@
+"""add fsrs_parameters to profiles
+
+Revision ID: 5b1e8f0c93a2
+Revises: 0769acad9ada
+Create Date: 2026-10-18 17:12:44.208519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '5b1e8f0c93a2'
+down_revision: Union[str, None] = '0769acad9ada'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('profiles', sa.Column('fsrs_parameters', postgresql.ARRAY(sa.Float()), nullable=True))
+    op.add_column('profiles', sa.Column('fsrs_parameters_updated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('profiles', 'fsrs_parameters_updated_at')
+    op.drop_column('profiles', 'fsrs_parameters')
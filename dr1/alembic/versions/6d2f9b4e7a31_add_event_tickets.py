@@ -0,0 +1,33 @@
+"""add event_tickets
+
+Revision ID: 6d2f9b4e7a31
+Revises: 1b7d4e9a3c58
+Create Date: 2026-10-18 22:41:09.318245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '6d2f9b4e7a31'
+down_revision: Union[str, None] = '1b7d4e9a3c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('event_tickets',
+    sa.Column('ticket_hash', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ticket_hash')
+    )
+    op.create_index('ix_event_tickets_expires_at', 'event_tickets', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_tickets_expires_at', table_name='event_tickets')
+    op.drop_table('event_tickets')
@@ -0,0 +1,28 @@
+"""add a lease and heartbeat to studyset_jobs
+
+Revision ID: 8a4c1e6f2d97
+Revises: 6d2f9b4e7a31
+Create Date: 2026-10-18 23:12:54.604718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '8a4c1e6f2d97'
+down_revision: Union[str, None] = '6d2f9b4e7a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('studyset_jobs', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('studyset_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE studyset_jobs SET claimed_at = started_at, heartbeat_at = started_at WHERE status = 'running'")
+
+
+def downgrade() -> None:
+    op.drop_column('studyset_jobs', 'heartbeat_at')
+    op.drop_column('studyset_jobs', 'claimed_at')
@@ -0,0 +1,36 @@
+"""add accepted_answers
+
+Revision ID: c2f95a3d7b18
+Revises: a84d2c6f1e07
+Create Date: 2026-10-18 18:20:37.114902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c2f95a3d7b18'
+down_revision: Union[str, None] = 'a84d2c6f1e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('accepted_answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_type', sa.String(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('answer_key', sa.String(), nullable=False),
+    sa.Column('source', sa.String(), server_default='generated', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('item_type', 'item_id', 'answer_key', name='uq_accepted_answers_item_answer')
+    )
+    op.create_index(op.f('ix_accepted_answers_id'), 'accepted_answers', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_accepted_answers_id'), table_name='accepted_answers')
+    op.drop_table('accepted_answers')
@@ -0,0 +1,104 @@
+"""add user_review_logs, store card_json as jsonb and drop review_logs_json
+
+Revision ID: d191de28ba54
+Revises: e030f7db684d
+Create Date: 2026-10-18 10:04:12.551907
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = 'd191de28ba54'
+down_revision: Union[str, None] = 'e030f7db684d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _load_json(value):
+    while isinstance(value, str):
+        value = json.loads(value)
+    return value
+
+
+def upgrade() -> None:
+    op.create_table('user_review_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('item_type', sa.String(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('review_datetime', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('review_duration', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_review_logs_id'), 'user_review_logs', ['id'], unique=False)
+    op.create_index('ix_user_review_logs_user_item', 'user_review_logs', ['user_id', 'item_type', 'item_id'], unique=False)
+
+    op.alter_column('user_card_reviews', 'card_json',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               existing_nullable=False,
+               postgresql_using="CASE WHEN json_typeof(card_json) = 'string' THEN (card_json #>> '{}')::jsonb ELSE card_json::jsonb END")
+
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, user_id, item_type, item_id, review_logs_json FROM user_card_reviews "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        logs = []
+        for row in rows:
+            for log in _load_json(row.review_logs_json) or []:
+                logs.append({
+                    "user_id": row.user_id,
+                    "item_type": row.item_type,
+                    "item_id": row.item_id,
+                    "rating": log["rating"],
+                    "review_datetime": log["review_datetime"],
+                    "review_duration": log.get("review_duration"),
+                })
+        if logs:
+            conn.execute(
+                sa.text(
+                    "INSERT INTO user_review_logs (user_id, item_type, item_id, rating, review_datetime, review_duration) "
+                    "VALUES (:user_id, :item_type, :item_id, :rating, CAST(:review_datetime AS TIMESTAMPTZ), :review_duration)"
+                ),
+                logs
+            )
+        last_id = rows[-1].id
+
+    op.drop_column('user_card_reviews', 'review_logs_json')
+
+
+def downgrade() -> None:
+    op.add_column('user_card_reviews', sa.Column('review_logs_json', sa.JSON(), nullable=False, server_default='[]'))
+    op.execute(
+        "UPDATE user_card_reviews r SET review_logs_json = to_json(l.logs::text) FROM ("
+        "SELECT user_id, item_type, item_id, json_agg(json_build_object("
+        "'card_id', 0, 'rating', rating, 'review_datetime', review_datetime, 'review_duration', review_duration"
+        ") ORDER BY review_datetime) AS logs FROM user_review_logs GROUP BY user_id, item_type, item_id"
+        ") l WHERE r.user_id = l.user_id AND r.item_type = l.item_type AND r.item_id = l.item_id"
+    )
+    op.alter_column('user_card_reviews', 'review_logs_json', server_default=None)
+    op.alter_column('user_card_reviews', 'card_json',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               existing_nullable=False,
+               postgresql_using="to_json(card_json::text)")
+    op.drop_index('ix_user_review_logs_user_item', table_name='user_review_logs')
+    op.drop_index(op.f('ix_user_review_logs_id'), table_name='user_review_logs')
+    op.drop_table('user_review_logs')
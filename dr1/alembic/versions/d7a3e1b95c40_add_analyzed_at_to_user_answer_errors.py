@@ -0,0 +1,27 @@
+"""add analyzed_at to user_answer_errors
+
+Revision ID: d7a3e1b95c40
+Revises: c2f95a3d7b18
+Create Date: 2026-10-18 18:52:03.671245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd7a3e1b95c40'
+down_revision: Union[str, None] = 'c2f95a3d7b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_answer_errors', sa.Column('analyzed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_user_answer_errors_user_analyzed_at', 'user_answer_errors', ['user_id', 'analyzed_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_answer_errors_user_analyzed_at', table_name='user_answer_errors')
+    op.drop_column('user_answer_errors', 'analyzed_at')
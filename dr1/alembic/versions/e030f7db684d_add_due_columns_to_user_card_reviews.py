@@ -0,0 +1,74 @@
+"""add due_at, state, stability, difficulty to user_card_reviews
+
+Revision ID: e030f7db684d
+Revises: 9ccbb7e3b591
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e030f7db684d'
+down_revision: Union[str, None] = '9ccbb7e3b591'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _load_card(card_json):
+    card = card_json
+    while isinstance(card, str):
+        card = json.loads(card)
+    return card or None
+
+
+def upgrade() -> None:
+    op.add_column('user_card_reviews', sa.Column('due_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('user_card_reviews', sa.Column('state', sa.Integer(), nullable=True))
+    op.add_column('user_card_reviews', sa.Column('stability', sa.Float(), nullable=True))
+    op.add_column('user_card_reviews', sa.Column('difficulty', sa.Float(), nullable=True))
+
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT id, card_json FROM user_card_reviews WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            card = _load_card(row.card_json)
+            if card and card.get("due"):
+                updates.append({
+                    "id": row.id,
+                    "due_at": card["due"],
+                    "state": card.get("state"),
+                    "stability": card.get("stability"),
+                    "difficulty": card.get("difficulty"),
+                })
+        if updates:
+            conn.execute(
+                sa.text(
+                    "UPDATE user_card_reviews SET due_at = CAST(:due_at AS TIMESTAMPTZ), state = :state, "
+                    "stability = :stability, difficulty = :difficulty WHERE id = :id"
+                ),
+                updates
+            )
+        last_id = rows[-1].id
+
+    op.create_index('ix_user_card_reviews_user_review_due', 'user_card_reviews', ['user_id', 'is_review', 'due_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_card_reviews_user_review_due', table_name='user_card_reviews')
+    op.drop_column('user_card_reviews', 'difficulty')
+    op.drop_column('user_card_reviews', 'stability')
+    op.drop_column('user_card_reviews', 'state')
+    op.drop_column('user_card_reviews', 'due_at')
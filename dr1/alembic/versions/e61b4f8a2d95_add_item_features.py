@@ -0,0 +1,57 @@
+"""add item_features
+
+Revision ID: e61b4f8a2d95
+Revises: d7a3e1b95c40
+Create Date: 2026-10-18 19:41:18.902317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = 'e61b4f8a2d95'
+down_revision: Union[str, None] = 'd7a3e1b95c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('item_features',
+    sa.Column('item_type', sa.String(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('level', sa.String(), nullable=True),
+    sa.Column('frequency', sa.Float(), nullable=True),
+    sa.Column('categories', postgresql.ARRAY(sa.Integer()), nullable=True),
+    sa.Column('component_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('meaning_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('member_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('item_type', 'item_id')
+    )
+    op.execute("""
+        INSERT INTO item_features (item_type, item_id, level, frequency, categories, component_count, meaning_count)
+        SELECT 'word', w.id, w.level, w.frequency, w.categories, coalesce(c.n, 0), coalesce(m.n, 0)
+        FROM words w
+        LEFT JOIN (SELECT word_id, count(*) AS n FROM word_component_links GROUP BY word_id) c ON c.word_id = w.id
+        LEFT JOIN (SELECT word_id, count(*) AS n FROM word_meanings GROUP BY word_id) m ON m.word_id = w.id
+    """)
+    op.execute("""
+        INSERT INTO item_features (item_type, item_id, level, frequency, categories, component_count, meaning_count)
+        SELECT 'phrase', p.id, p.level, p.frequency, p.categories, coalesce(c.n, 0), coalesce(m.n, 0)
+        FROM phrases p
+        LEFT JOIN (SELECT phrase_id, count(*) AS n FROM phrase_components GROUP BY phrase_id) c ON c.phrase_id = p.id
+        LEFT JOIN (SELECT phrase_id, count(*) AS n FROM phrase_meanings GROUP BY phrase_id) m ON m.phrase_id = p.id
+    """)
+    op.execute("""
+        INSERT INTO item_features (item_type, item_id, level, frequency, categories, member_count)
+        SELECT 'group', g.id, g.level, g.frequency, g.categories, coalesce(l.n, 0)
+        FROM semantic_groups g
+        LEFT JOIN (SELECT group_id, count(*) AS n FROM semantic_group_links GROUP BY group_id) l ON l.group_id = g.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('item_features')
@@ -0,0 +1,24 @@
+"""add item_features categories index
+
+Revision ID: f3c8d0a6b214
+Revises: e61b4f8a2d95
+Create Date: 2026-10-18 20:05:52.447810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'f3c8d0a6b214'
+down_revision: Union[str, None] = 'e61b4f8a2d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_item_features_categories', 'item_features', ['categories'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_item_features_categories', table_name='item_features', postgresql_using='gin')
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -9,6 +10,36 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "thesd_db"
+    GEMINI_ANALYSIS_WORKERS: int = 4
+    GEMINI_ANALYSIS_MAX_ATTEMPTS: int = 3
+    GEMINI_ANALYSIS_RETRY_SECONDS: float = 30.0
+    GEMINI_ANALYSIS_LEASE_SECONDS: int = 300
+    GEMINI_CACHE_SIZE: int = 10000
+    GEMINI_CACHE_TTL_SECONDS: int = 86400
+    FSRS_DESIRED_RETENTION: float = 0.9
+    FSRS_MAXIMUM_INTERVAL: int = 36500
+    DUE_QUEUE_MAX_CARDS: int = 2000000
+    DUE_QUEUE_TTL_SECONDS: int = 1800
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT_SECONDS: float = 20.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BACKOFF_SECONDS: float = 0.5
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LEASE_SECONDS: int = 60
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_QUEUE_SIZE: int = 100
+    SSE_REPLAY_LIMIT: int = 500
+    SSE_TICKET_TTL_SECONDS: int = 30
+    STUDYSET_POOL_SIZE: int = 5000
+    STUDYSET_SAMPLE_PERCENT: Optional[float] = None
+    STUDYSET_SAMPLE_ROWS: int = 200000
+    STUDYSET_LEVEL_WINDOW: int = 1
+    STUDYSET_JOB_WORKERS: int = 2
+    STUDYSET_JOB_HEARTBEAT_SECONDS: float = 30.0
+    STUDYSET_JOB_STALE_SECONDS: int = 120
+    STUDYSET_JOB_SWEEP_SECONDS: float = 60.0
 
     class Config:
         env_file = ".env"
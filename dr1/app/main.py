@@ -3,7 +3,11 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(mess
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import phrases, parts_of_speech, auth, search, studyset, training, semantic_groups, notes, profile, categories, words, labels, components
+from .routers import phrases, parts_of_speech, auth, search, studyset, training, semantic_groups, notes, profile, categories, words, labels, components, accepted_answers
+from .services.error_analysis_service import start_error_analysis_workers, stop_error_analysis_workers
+from .services.pg_notifications import start_listener, stop_listener
+from .services.studyset_job_service import start_study_set_workers, stop_study_set_workers
+from .utils.http_client import start_http_client, stop_http_client
 
 app = FastAPI(
     title="German Language Learning API",
@@ -20,6 +24,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup():
+    await start_http_client()
+    await start_error_analysis_workers()
+    start_listener()
+    start_study_set_workers()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    stop_study_set_workers()
+    stop_listener()
+    await stop_error_analysis_workers()
+    await stop_http_client()
+
 # Optional: Custom OpenAPI schema function (uncomment to use)
 # def custom_openapi():
 #     if app.openapi_schema:
@@ -73,3 +92,6 @@ app.include_router(components.router, prefix="/api", tags=["components"])
 
 
 app.include_router(search.router, prefix="/api", tags=["search"])
+
+
+app.include_router(accepted_answers.router, prefix="/api", tags=["accepted_answers"])
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float, JSON, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Boolean, Float, JSON, Enum, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
 from enum import Enum as PyEnum
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 
 
 class User(Base):
@@ -48,6 +48,8 @@ class Profile(Base):
     daily_minutes = Column(Integer, nullable=True)  
     desired_level = Column(String, nullable=True)   
     current_level = Column(String, nullable=True)   
+    fsrs_parameters = Column(ARRAY(Float), nullable=True)
+    fsrs_parameters_updated_at = Column(DateTime(timezone=True), nullable=True)
     user = relationship("User", back_populates="profile")
 
 
@@ -136,6 +138,8 @@ class Phrase(Base):
     categories = Column(ARRAY(Integer), nullable=True) 
     level = Column(String, nullable=True)     
     frequency = Column(Float, nullable=True)  
+    canonical_text = Column(String, nullable=True)
+    canonical_text_normalized = Column(String, nullable=True)
     components = relationship("PhraseComponent", back_populates="phrase")
     labels = relationship("PhraseLabelLink", back_populates="phrase")
     semantic_links = relationship("SemanticGroupLink", back_populates="phrase")
@@ -245,15 +249,55 @@ class UserCardReview(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     item_type = Column(String, nullable=False)  
     item_id = Column(Integer, nullable=False)
-    card_json = Column(JSON, nullable=False)
-    review_logs_json = Column(JSON, nullable=False)
+    card_json = Column(JSONB, nullable=False)
     last_rating = Column(Integer, nullable=True)
     last_answer = Column(String, nullable=True)
     last_result = Column(Boolean, nullable=True)
     is_review = Column(Boolean, default=False) 
+    due_at = Column(DateTime(timezone=True), nullable=True)
+    state = Column(Integer, nullable=True)
+    stability = Column(Float, nullable=True)
+    difficulty = Column(Float, nullable=True)
+    last_review_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "item_type", "item_id", name="uq_user_card_reviews_user_item"),
+        Index("ix_user_card_reviews_user_review_due", "user_id", "is_review", "due_at"),
+    )
+
+
+class UserAnswerAttempt(Base):
+    __tablename__ = "user_answer_attempts"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    item_type = Column(String, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    answer = Column(String, nullable=True)
+    is_correct = Column(Boolean, nullable=False)
+
+    __table_args__ = (
+        Index("ix_user_answer_attempts_user_item", "user_id", "item_type", "item_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class UserReviewLog(Base):
+    __tablename__ = "user_review_logs"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    item_type = Column(String, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    rating = Column(Integer, nullable=False)
+    review_datetime = Column(DateTime(timezone=True), nullable=False)
+    review_duration = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ix_user_review_logs_user_item", "user_id", "item_type", "item_id"),
+    )
+
 
 class WordMeaning(Base):
     __tablename__ = "word_meanings"
@@ -302,10 +346,36 @@ class UserAnswerError(Base):
     user_answer = Column(String)
     error_analysis = Column(String)
     brief_explanation = Column(String)
+    analysis_status = Column(String, nullable=False, default="done", server_default="done")
     created_at = Column(DateTime, default=datetime.utcnow)
+    analyzed_at = Column(DateTime(timezone=True), nullable=True)
+    analysis_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    analysis_claimed_at = Column(DateTime(timezone=True), nullable=True)
 
     user = relationship("User", back_populates="answer_errors")
 
+    __table_args__ = (
+        Index("ix_user_answer_errors_pending", "id", postgresql_where=text("analysis_status IN ('pending', 'running')")),
+        Index("ix_user_answer_errors_user_analyzed_at", "user_id", "analyzed_at", "id"),
+    )
+
+
+class GeminiAnalysisCache(Base):
+    __tablename__ = "gemini_analysis_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    correct_answer_key = Column(String, nullable=False)
+    user_answer_key = Column(String, nullable=False)
+    error_analysis = Column(String, nullable=False)
+    brief_explanation = Column(String, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("correct_answer_key", "user_answer_key", name="uq_gemini_analysis_cache_key"),
+    )
+
 
 class UserWordNote(Base):
     __tablename__ = "user_word_notes"
@@ -335,3 +405,90 @@ class SpecialUserStudySet(Base):
     root = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     user = relationship("User")
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String, primary_key=True)
+    endpoint = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    response = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+
+class EventTicket(Base):
+    __tablename__ = "event_tickets"
+
+    ticket_hash = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_event_tickets_expires_at", "expires_at"),
+    )
+
+
+class AcceptedAnswer(Base):
+    __tablename__ = "accepted_answers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_type = Column(String, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    answer_key = Column(String, nullable=False)
+    source = Column(String, nullable=False, default="generated", server_default="generated")
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        UniqueConstraint("item_type", "item_id", "answer_key", name="uq_accepted_answers_item_answer"),
+    )
+
+
+class ItemFeatures(Base):
+    __tablename__ = "item_features"
+
+    item_type = Column(String, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    level = Column(String, nullable=True)
+    frequency = Column(Float, nullable=True)
+    categories = Column(ARRAY(Integer), nullable=True)
+    component_count = Column(Integer, nullable=False, default=0, server_default="0")
+    meaning_count = Column(Integer, nullable=False, default=0, server_default="0")
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        Index("ix_item_features_categories", "categories", postgresql_using="gin"),
+    )
+
+
+class StudySetJob(Base):
+    __tablename__ = "studyset_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    requested_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    mode = Column(String, nullable=False, default="ga", server_default="ga")
+    params = Column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))
+    status = Column(String, nullable=False, default="pending", server_default="pending")
+    study_set_id = Column(Integer, ForeignKey("user_study_sets.id", ondelete="SET NULL"), nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=text("now()"))
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    study_set = relationship("UserStudySet")
+
+    __table_args__ = (
+        Index(
+            "uq_studyset_jobs_active_user", "user_id", unique=True,
+            postgresql_where=text("status IN ('pending', 'running')")
+        ),
+    )
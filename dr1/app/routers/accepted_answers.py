@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+from .. import models, schemas, auth
+from ..database import SessionLocal
+from app.services.accepted_answer_service import get_accepted_answers, add_accepted_answer, remove_accepted_answer, rebuild_accepted_answers
+
+router = APIRouter()
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def require_admin(current_user: models.User):
+    if not any(role.role.name == "admin" for role in current_user.roles):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+def get_item(db: Session, item_type: str, item_id: int):
+    model = models.Word if item_type == "word" else models.Phrase
+    return db.query(model.id).filter(model.id == item_id).first()
+
+@router.get("/accepted_answers", response_model=List[schemas.AcceptedAnswerResponse])
+def read_accepted_answers(
+    item_type: str = Query(..., pattern="^(word|phrase)$"),
+    item_id: int = Query(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    require_admin(current_user)
+    return get_accepted_answers(db, item_type, item_id)
+
+@router.post("/accepted_answers", response_model=schemas.AcceptedAnswerResponse)
+def create_accepted_answer(
+    data: schemas.AcceptedAnswerCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    require_admin(current_user)
+    if data.item_type not in ("word", "phrase"):
+        raise HTTPException(status_code=422, detail="item_type must be 'word' or 'phrase'")
+    if not data.answer.strip():
+        raise HTTPException(status_code=422, detail="Answer must not be empty")
+    if not get_item(db, data.item_type, data.item_id):
+        raise HTTPException(status_code=404, detail="Item not found")
+    return add_accepted_answer(db, data.item_type, data.item_id, data.answer)
+
+@router.delete("/accepted_answers/{answer_id}", status_code=204)
+def delete_accepted_answer(
+    answer_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    require_admin(current_user)
+    if not remove_accepted_answer(db, answer_id):
+        raise HTTPException(status_code=404, detail="Accepted answer not found")
+    return
+
+@router.post("/accepted_answers/rebuild", response_model=List[schemas.AcceptedAnswerResponse])
+def rebuild_item_accepted_answers(
+    item_type: str = Query(..., pattern="^(word|phrase)$"),
+    item_id: int = Query(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    require_admin(current_user)
+    if not get_item(db, item_type, item_id):
+        raise HTTPException(status_code=404, detail="Item not found")
+    rebuild_accepted_answers(db, item_type, [item_id])
+    db.commit()
+    return get_accepted_answers(db, item_type, item_id)
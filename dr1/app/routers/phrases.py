@@ -4,6 +4,8 @@ from typing import List
 from .. import models, schemas, auth
 from ..database import SessionLocal
 from app.services.phrase_service import *
+from app.services.phrase_service import refresh_phrase_canonical_text
+from app.services.item_features_service import mark_item_features_stale
 
 router = APIRouter()
 
@@ -273,11 +275,14 @@ def update_phrase(phrase_id: int, phrase_update: schemas.PhraseUpdate, db: Sessi
     
     if phrase_update.words is not None:
         db.query(models.PhraseComponent).filter(models.PhraseComponent.phrase_id == phrase_id).delete()
+        mark_item_features_stale(db, "phrase", [phrase_id])
         db.commit()
         for order, word_id in enumerate(phrase_update.words):
             db_phrase_component = models.PhraseComponent(phrase_id=phrase.id, word_id=word_id, order=order)
             db.add(db_phrase_component)
         db.commit()
+        refresh_phrase_canonical_text([phrase.id], db)
+        db.commit()
     
     if phrase_update.labels is not None:
         db.query(models.PhraseLabelLink).filter(models.PhraseLabelLink.phrase_id == phrase_id).delete()
@@ -4,6 +4,8 @@ from .. import models, schemas, auth
 from ..database import SessionLocal
 from typing import List
 from app.utils.gemini import analyze_error_with_gemini
+from app.utils.http_client import post_json
+from app.services.item_features_service import mark_item_features_stale
 import logging
 import os
 
@@ -17,9 +19,7 @@ def get_db():
         db.close()
 
 def phrase_to_text(phrase):
-    
-    words = [pc.word.text for pc in sorted(phrase.components, key=lambda c: c.order) if pc.word]
-    return " ".join(words) if words else str(phrase.id)
+    return phrase.canonical_text or str(phrase.id)
 
 async def generate_semantic_group_difference_explanation(group_id: int, db_session_factory):
     db = db_session_factory()
@@ -63,13 +63,8 @@ async def gemini_laconic_explanation(prompt: str) -> str:
         "contents": [{"parts": [{"text": prompt}]}]
     }
     try:
-        import httpx
-        async with httpx.AsyncClient() as client:
-            response = await client.post(GEMINI_URL, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-            
-            return result["candidates"][0]["content"]["parts"][0]["text"]
+        result = await post_json(GEMINI_URL, data, headers=headers, timeout=30)
+        return result["candidates"][0]["content"]["parts"][0]["text"]
     except Exception as e:
         print(f"Gemini API error: {e}")
         return f"ERROR: {e}"
@@ -300,6 +295,7 @@ async def update_semantic_group(
     if "word_ids" in data or "phrase_ids" in data:
         
         db.query(models.SemanticGroupLink).filter(models.SemanticGroupLink.group_id == group_id).delete()
+        mark_item_features_stale(db, "group", [group_id])
         for word_id in data.get("word_ids", []):
             link = models.SemanticGroupLink(group_id=group_id, word_id=word_id)
             db.add(link)
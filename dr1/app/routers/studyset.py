@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Response
 from sqlalchemy.orm import Session
 from .. import models, schemas, auth
 from ..database import SessionLocal
 from datetime import datetime
-from app.services.studyset_service import genetic_algorithm
+from app.services.studyset_service import build_study_set
+from app.services.studyset_job_service import submit_study_set_job
 
 router = APIRouter()
 
@@ -14,12 +15,7 @@ def get_db():
     finally:
         db.close()
 
-@router.post("/studyset/generate", response_model=schemas.UserStudySetResponse)
-def generate_study_set(
-    req: schemas.StudySetGenerateRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
-):
+def resolve_target_user(req, db, current_user):
     user = None
     if req.user_id is not None:
         user = db.query(models.User).filter(models.User.id == req.user_id).first()
@@ -29,6 +25,19 @@ def generate_study_set(
         user = current_user
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if req.mode not in ("ga", "exact"):
+        raise HTTPException(status_code=422, detail="mode must be 'ga' or 'exact'")
+    if req.mode != "exact" and (req.max_per_category is not None or req.max_per_semantic_group is not None):
+        raise HTTPException(status_code=422, detail="Diversity constraints are only supported with mode 'exact'")
+    return user
+
+@router.post("/studyset/generate", response_model=schemas.UserStudySetResponse)
+def generate_study_set(
+    req: schemas.StudySetGenerateRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    user = resolve_target_user(req, db, current_user)
     if user.profile is None:
         raise HTTPException(status_code=400, detail="User profile is not set. Please fill in your profile before generating a study set.")
     if req.root:
@@ -80,7 +89,7 @@ def generate_study_set(
             "created_at": special_study_set.created_at
         }
     else:
-        word_ids, phrase_ids, group_ids = genetic_algorithm(user, db)
+        word_ids, phrase_ids, group_ids = build_study_set(user, db, req.mode, req.max_per_category, req.max_per_semantic_group)
         study_set = models.UserStudySet(
             user_id=user.id,
             word_ids=word_ids,
@@ -100,6 +109,40 @@ def generate_study_set(
         "created_at": study_set.created_at
     }
 
+@router.post("/studyset/jobs", response_model=schemas.StudySetJobResponse, status_code=202)
+def create_study_set_job(
+    req: schemas.StudySetGenerateRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if req.root:
+        raise HTTPException(status_code=422, detail="Root-based study sets are generated synchronously via /studyset/generate")
+    user = resolve_target_user(req, db, current_user)
+    if user.profile is None:
+        raise HTTPException(status_code=400, detail="User profile is not set. Please fill in your profile before generating a study set.")
+    job, created = submit_study_set_job(db, user, current_user, req.mode, {
+        "max_per_category": req.max_per_category,
+        "max_per_semantic_group": req.max_per_semantic_group
+    })
+    if not created:
+        response.status_code = 200
+    return job
+
+@router.get("/studyset/jobs/{job_id}", response_model=schemas.StudySetJobResponse)
+def get_study_set_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    job = db.query(models.StudySetJob).filter(models.StudySetJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Study set job not found")
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if current_user.id not in (job.user_id, job.requested_by) and not is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized to view this job")
+    return job
+
 @router.get("/studyset/latest", response_model=schemas.UserStudySetResponse)
 def get_latest_study_set(db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
     study_set = db.query(models.UserStudySet).filter(models.UserStudySet.user_id == current_user.id).order_by(models.UserStudySet.created_at.desc()).first()
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Header, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from .. import models, schemas, auth
 from ..database import SessionLocal
+from ..config import settings
 from datetime import datetime, timezone, timedelta
 from fsrs import Scheduler, Card, Rating, ReviewLog
+import asyncio
 import json
 from typing import Optional, List
-from app.utils.gemini import analyze_error_with_gemini
-from app.services.training_service import start_training_service, submit_answer_service, rate_answer_service
+from app.services.forecast_service import review_forecast
+from app.services.retrievability_service import weakest_items, expected_retention
+from app.services.analysis_cache_service import get_cache_stats, purge_analysis_cache
+from app.services.training_session_service import TrainingSession
+from app.services.event_ticket_service import issue_event_ticket, redeem_event_ticket
+from app.services.error_analysis_events import add_subscriber, remove_subscriber, events_since, parse_event_id
+from app.services.idempotency_service import claim_idempotency_key, store_idempotency_response, release_idempotency_key
+from app.services.training_service import start_training_service, submit_answer_service, rate_answer_service, rate_answers_service, MAX_TRAINING_COUNT
 
 router = APIRouter()
 
@@ -20,44 +30,218 @@ def get_db():
 
 @router.post("/training/start")
 def start_training(
-    count: int = Query(...),
+    count: int = Query(..., ge=1, le=MAX_TRAINING_COUNT),
     is_review: bool = Query(False),
+    order: str = Query("due", pattern="^(due|retrievability)$"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    return start_training_service(count, is_review, db, current_user)
+    return start_training_service(count, is_review, db, current_user, order)
 
 @router.post("/special-training/start")
 def special_training_start(
-    count: int = Query(...),
+    count: int = Query(..., ge=1, le=MAX_TRAINING_COUNT),
     is_review: bool = Query(False),
+    order: str = Query("due", pattern="^(due|retrievability)$"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    return start_training_service(count, is_review, db, current_user)
+    return start_training_service(count, is_review, db, current_user, order)
 
 @router.post("/training/submit_answer", response_model=schemas.TrainingAnswerResponse)
 async def submit_answer(
     data: schemas.TrainingAnswerRequest = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    result = await submit_answer_service(data, db, current_user)
+    if idempotency_key:
+        stored = claim_idempotency_key(db, current_user.id, idempotency_key, "submit_answer", data)
+        if stored is not None:
+            return stored
+    try:
+        result = await submit_answer_service(data, db, current_user)
+    except Exception:
+        if idempotency_key:
+            release_idempotency_key(db, current_user.id, idempotency_key)
+        raise
     if result is None:
+        if idempotency_key:
+            release_idempotency_key(db, current_user.id, idempotency_key)
         raise HTTPException(status_code=404, detail="Item not found or no text found for this item")
+    if idempotency_key:
+        store_idempotency_response(db, current_user.id, idempotency_key, schemas.TrainingAnswerResponse(**result).model_dump(mode="json"))
     return result
 
 @router.post("/training/rate_answer", response_model=schemas.UserCardReviewResponse)
 def rate_answer(
     data: schemas.TrainingRateAnswerRequest = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    result = rate_answer_service(data, db, current_user)
+    if idempotency_key:
+        stored = claim_idempotency_key(db, current_user.id, idempotency_key, "rate_answer", data)
+        if stored is not None:
+            return stored
+    try:
+        result = rate_answer_service(data, db, current_user)
+    except Exception:
+        if idempotency_key:
+            release_idempotency_key(db, current_user.id, idempotency_key)
+        raise
     if result is None:
+        if idempotency_key:
+            release_idempotency_key(db, current_user.id, idempotency_key)
         raise HTTPException(status_code=404, detail="No answer submitted for this card or invalid rating")
+    if idempotency_key:
+        store_idempotency_response(db, current_user.id, idempotency_key, schemas.UserCardReviewResponse.model_validate(result).model_dump(mode="json"))
     return result
 
+@router.post("/training/rate_answers", response_model=schemas.TrainingRateAnswersResponse)
+def rate_answers(
+    data: schemas.TrainingRateAnswersRequest = Body(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    return rate_answers_service(data, db, current_user)
+
+WS_AUTH_SUBPROTOCOL = "bearer"
+
+def read_user_from_token(token):
+    db = SessionLocal()
+    try:
+        return auth.get_user_from_token(token, db)
+    finally:
+        db.close()
+
+@router.websocket("/ws/training")
+async def training_websocket(websocket: WebSocket):
+    subprotocols = websocket.scope.get("subprotocols", [])
+    user = None
+    if len(subprotocols) == 2 and subprotocols[0] == WS_AUTH_SUBPROTOCOL:
+        user = await run_in_threadpool(read_user_from_token, subprotocols[1])
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept(subprotocol=WS_AUTH_SUBPROTOCOL)
+    await TrainingSession(websocket, user).run()
+
+SSE_RETRY_MS = 3000
+
+def read_events_since(user_id, since):
+    db = SessionLocal()
+    try:
+        return events_since(db, user_id, since)
+    finally:
+        db.close()
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: error_analysis\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+def redeem_ticket(ticket):
+    db = SessionLocal()
+    try:
+        return redeem_event_ticket(db, ticket)
+    finally:
+        db.close()
+
+@router.post("/training/events/ticket", response_model=dict)
+def create_training_events_ticket(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    return issue_event_ticket(db, current_user.id)
+
+@router.get("/training/events")
+async def training_events(
+    request: Request,
+    ticket: str = Query(...),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    last_event_id_param: Optional[str] = Query(None, alias="last_event_id")
+):
+    user_id = await run_in_threadpool(redeem_ticket, ticket)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    last_event_id = last_event_id or last_event_id_param
+
+    async def stream():
+        subscriber = add_subscriber(user_id)
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            since = parse_event_id(last_event_id)
+            subscriber.overflowed = since is not None
+            since = since or (datetime.now(timezone.utc), 0)
+            while not await request.is_disconnected():
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    while True:
+                        replayed = await run_in_threadpool(read_events_since, user_id, since)
+                        for event in replayed:
+                            since = parse_event_id(event["id"])
+                            yield format_event(event)
+                        if len(replayed) < settings.SSE_REPLAY_LIMIT:
+                            break
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                position = parse_event_id(event["id"])
+                if position <= since:
+                    continue
+                since = position
+                yield format_event(event)
+        finally:
+            remove_subscriber(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@router.get("/training/weakest", response_model=List[dict])
+def get_weakest_items(
+    limit: int = Query(50, ge=1, le=1000),
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if user_id and not is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can view other users' stats")
+    return weakest_items(db, user_id if user_id else current_user.id, limit)
+
+@router.get("/training/expected_retention", response_model=dict)
+def get_expected_retention(
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if user_id and not is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can view other users' stats")
+    return expected_retention(db, user_id if user_id else current_user.id)
+
+@router.get("/training/forecast", response_model=dict)
+def get_review_forecast(
+    days: int = Query(30, ge=1, le=3650),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    return review_forecast(db, days, current_user.id)
+
+@router.get("/training/forecast/all", response_model=dict)
+def get_review_forecast_all(
+    days: int = Query(30, ge=1, le=3650),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can view all users' forecast")
+    return review_forecast(db, days)
+
 @router.get("/training/error_stats", response_model=dict)
 def get_error_stats(
     error_type: Optional[str] = None,
@@ -69,24 +253,24 @@ def get_error_stats(
     if user_id and not is_admin:
         raise HTTPException(status_code=403, detail="Only admins can view other users' stats")
     target_user_id = user_id if user_id else current_user.id
-    query = db.query(models.UserAnswerError).filter(models.UserAnswerError.user_id == target_user_id)
+    query = db.query(models.UserAnswerError).filter(
+        models.UserAnswerError.user_id == target_user_id,
+        models.UserAnswerError.analysis_status == "done"
+    )
     if error_type:
         query = query.filter(models.UserAnswerError.error_analysis == error_type)
     errors = query.all()
     error_types = {}
     for error in errors:
         error_types[error.error_analysis] = error_types.get(error.error_analysis, 0) + 1
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     month_ago = now - timedelta(days=30)
     three_months_ago = now - timedelta(days=90)
     year_ago = now - timedelta(days=365)
-    reviews_query = db.query(models.UserCardReview).filter(
-        models.UserCardReview.user_id == target_user_id,
-        models.UserCardReview.is_review == True
-    )
-    monthly_reviews = reviews_query.filter(models.UserCardReview.created_at >= month_ago).count()
-    three_monthly_reviews = reviews_query.filter(models.UserCardReview.created_at >= three_months_ago).count()
-    yearly_reviews = reviews_query.filter(models.UserCardReview.created_at >= year_ago).count()
+    reviews_query = db.query(models.UserReviewLog).filter(models.UserReviewLog.user_id == target_user_id)
+    monthly_reviews = reviews_query.filter(models.UserReviewLog.review_datetime >= month_ago).count()
+    three_monthly_reviews = reviews_query.filter(models.UserReviewLog.review_datetime >= three_months_ago).count()
+    yearly_reviews = reviews_query.filter(models.UserReviewLog.review_datetime >= year_ago).count()
     return {
         "error_statistics": {
             "total_errors": len(errors),
@@ -137,7 +321,8 @@ def get_confidence_stats(
         (models.UserAnswerError.item_type == models.UserCardReview.item_type) &
         (models.UserAnswerError.item_id == models.UserCardReview.item_id)
     ).filter(
-        models.UserAnswerError.user_id == target_user_id
+        models.UserAnswerError.user_id == target_user_id,
+        models.UserAnswerError.analysis_status == "done"
     ).all()
     stats = {
         "by_error_type": {},
@@ -202,21 +387,21 @@ def get_error_stats_all(
     is_admin = any(role.role.name == "admin" for role in current_user.roles)
     if not is_admin:
         raise HTTPException(status_code=403, detail="Only admins can view all users' stats")
-    query = db.query(models.UserAnswerError)
+    query = db.query(models.UserAnswerError).filter(models.UserAnswerError.analysis_status == "done")
     if error_type:
         query = query.filter(models.UserAnswerError.error_analysis == error_type)
     errors = query.all()
     error_types = {}
     for error in errors:
         error_types[error.error_analysis] = error_types.get(error.error_analysis, 0) + 1
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     month_ago = now - timedelta(days=30)
     three_months_ago = now - timedelta(days=90)
     year_ago = now - timedelta(days=365)
-    reviews_query = db.query(models.UserCardReview).filter(models.UserCardReview.is_review == True)
-    monthly_reviews = reviews_query.filter(models.UserCardReview.created_at >= month_ago).count()
-    three_monthly_reviews = reviews_query.filter(models.UserCardReview.created_at >= three_months_ago).count()
-    yearly_reviews = reviews_query.filter(models.UserCardReview.created_at >= year_ago).count()
+    reviews_query = db.query(models.UserReviewLog)
+    monthly_reviews = reviews_query.filter(models.UserReviewLog.review_datetime >= month_ago).count()
+    three_monthly_reviews = reviews_query.filter(models.UserReviewLog.review_datetime >= three_months_ago).count()
+    yearly_reviews = reviews_query.filter(models.UserReviewLog.review_datetime >= year_ago).count()
     return {
         "error_statistics": {
             "total_errors": len(errors),
@@ -244,4 +429,38 @@ def get_all_errors(
     query = db.query(models.UserAnswerError)
     if error_type:
         query = query.filter(models.UserAnswerError.error_analysis == error_type)
-    return query.offset(skip).limit(limit).all() 
\ No newline at end of file
+    return query.offset(skip).limit(limit).all()
+
+@router.get("/training/analysis_cache/stats", response_model=dict)
+def get_analysis_cache_stats(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can view analysis cache stats")
+    return get_cache_stats(db)
+
+@router.delete("/training/analysis_cache", response_model=dict)
+def purge_analysis_cache_endpoint(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can purge the analysis cache")
+    return {"deleted": purge_analysis_cache(db)}
+
+@router.get("/training/errors/{error_id}", response_model=schemas.UserAnswerError)
+def get_user_error(
+    error_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    error = db.query(models.UserAnswerError).filter(models.UserAnswerError.id == error_id).first()
+    if not error:
+        raise HTTPException(status_code=404, detail="Error not found")
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if error.user_id != current_user.id and not is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can view other users' errors")
+    return error
@@ -16,8 +16,8 @@ def get_db():
         db.close()
 
 def generate_stats_image(user, db):
-    total_words = db.query(models.UserCardReview).filter_by(user_id=user.id, item_type='word').count()
-    total_phrases = db.query(models.UserCardReview).filter_by(user_id=user.id, item_type='phrase').count()
+    total_words = db.query(models.UserAnswerAttempt).filter_by(user_id=user.id, item_type='word').count()
+    total_phrases = db.query(models.UserAnswerAttempt).filter_by(user_id=user.id, item_type='phrase').count()
     total_errors = db.query(models.UserAnswerError).filter_by(user_id=user.id).count()
     fig, ax = plt.subplots(figsize=(6, 4))
     ax.bar(['Words', 'Phrases', 'Errors'], [total_words, total_phrases, total_errors])
@@ -4,6 +4,9 @@ from typing import List
 from .. import models, schemas, auth
 from ..database import SessionLocal
 from app.services.word_service import *
+from app.services.word_service import ANSWER_FIELDS
+from app.services.phrase_service import refresh_phrase_canonical_text, phrase_ids_for_word
+from app.services.accepted_answer_service import rebuild_accepted_answers
 import logging
 import sqlalchemy
 import os
@@ -148,8 +151,14 @@ def update_word(word_id: int, word_update: schemas.WordUpdate, db: Session = Dep
     if not w:
         raise HTTPException(status_code=404, detail="Word not found")
     
-    for key, value in word_update.dict(exclude_unset=True, exclude={"meanings"}).items():
+    update_data = word_update.dict(exclude_unset=True, exclude={"meanings"})
+    for key, value in update_data.items():
         setattr(w, key, value)
+    db.flush()
+    if "text" in update_data:
+        refresh_phrase_canonical_text(phrase_ids_for_word(word_id, db), db)
+    if ANSWER_FIELDS & update_data.keys():
+        rebuild_accepted_answers(db, "word", [word_id])
     
     if word_update.meanings is not None:
         old_meanings = {m.id: m for m in w.meanings}
@@ -329,8 +329,8 @@ class UserAnswerErrorBase(BaseModel):
     item_id: int
     correct_answer: str
     user_answer: str
-    error_analysis: str
-    brief_explanation: str
+    error_analysis: Optional[str] = None
+    brief_explanation: Optional[str] = None
 
 
 class UserAnswerErrorCreate(UserAnswerErrorBase):
@@ -340,7 +340,9 @@ class UserAnswerErrorCreate(UserAnswerErrorBase):
 class UserAnswerError(UserAnswerErrorBase):
     id: int
     user_id: int
+    analysis_status: str = "done"
     created_at: datetime
+    analyzed_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -357,6 +359,8 @@ class TrainingAnswerResponse(BaseModel):
     correct_answer: str
     error_analysis: Optional[str] = None
     brief_explanation: Optional[str] = None
+    error_id: Optional[int] = None
+    analysis_status: Optional[str] = None
 
 
 class UserWordNoteCreate(BaseModel):
@@ -445,10 +449,54 @@ class TrainingRateAnswerRequest(BaseModel):
     is_review: bool  
 
 
+class TrainingRateAnswerItem(BaseModel):
+    item_type: str
+    item_id: int
+    rating: int
+    reviewed_at: Optional[datetime] = None
+
+
+class TrainingRateAnswersRequest(BaseModel):
+    items: List[TrainingRateAnswerItem]
+
+
+class TrainingRateAnswerResult(BaseModel):
+    item_type: str
+    item_id: int
+    success: bool
+    error: Optional[str] = None
+    review: Optional[UserCardReviewResponse] = None
+
+
+class TrainingRateAnswersResponse(BaseModel):
+    results: List[TrainingRateAnswerResult]
+    succeeded: int
+    failed: int
+
+
 class StudySetGenerateRequest(BaseModel):
     user_id: Optional[int] = None
     email: Optional[str] = None
     root: Optional[str] = None
+    mode: str = "ga"
+    max_per_category: Optional[int] = None
+    max_per_semantic_group: Optional[int] = None
+
+
+class StudySetJobResponse(BaseModel):
+    id: int
+    user_id: int
+    requested_by: Optional[int] = None
+    mode: str
+    status: str
+    error: Optional[str] = None
+    study_set: Optional[UserStudySetResponse] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 
 class PhraseMeaningExampleUpdate(BaseModel):
@@ -477,3 +525,21 @@ class WordMeaningExampleUpdate(BaseModel):
     id: Optional[int] = None
     example_text: Optional[str] = None
     example_text_german: Optional[str] = None
+
+
+class AcceptedAnswerCreate(BaseModel):
+    item_type: str
+    item_id: int
+    answer: str
+
+
+class AcceptedAnswerResponse(BaseModel):
+    id: int
+    item_type: str
+    item_id: int
+    answer_key: str
+    source: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
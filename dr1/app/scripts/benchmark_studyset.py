@@ -0,0 +1,142 @@
+import argparse
+import random
+import time
+from types import SimpleNamespace
+import numpy as np
+from ..services.studyset_service import item_scores, evolve
+
+LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+
+def legacy_evaluate_item(item, user_profile, type_):
+    score = 0
+    if hasattr(item, 'categories') and user_profile.categories and item.categories:
+        if set(user_profile.categories) & set(item.categories):
+            score -= 2
+    if hasattr(item, 'level') and user_profile.current_level and item.level:
+        if item.level > user_profile.current_level:
+            score += 2
+        elif item.level == user_profile.current_level:
+            score += 1
+    if hasattr(item, 'frequency') and item.frequency:
+        score += max(0, 10 - item.frequency)
+    if type_ == 'word':
+        score += getattr(item, 'component_count', 0) + getattr(item, 'value_count', 0)
+    elif type_ == 'phrase':
+        score += getattr(item, 'word_count', 0) + getattr(item, 'value_count', 0)
+    elif type_ == 'group':
+        score += getattr(item, 'member_count', 0)
+    return score
+
+def legacy_genetic_algorithm(words, phrases, groups, user_profile, population_size=30, generations=10, set_size=20):
+    n_words = int(set_size * 0.4)
+    n_phrases = int(set_size * 0.4)
+    n_groups = set_size - n_words - n_phrases
+    population = []
+    for _ in range(population_size):
+        word_ids = random.sample(list(words.keys()), min(n_words, len(words)))
+        phrase_ids = random.sample(list(phrases.keys()), min(n_phrases, len(phrases)))
+        group_ids = random.sample(list(groups.keys()), min(n_groups, len(groups)))
+        population.append((word_ids, phrase_ids, group_ids))
+    for _ in range(generations):
+        scored = []
+        for word_ids, phrase_ids, group_ids in population:
+            score = sum(legacy_evaluate_item(words[wid], user_profile, 'word') for wid in word_ids)
+            score += sum(legacy_evaluate_item(phrases[pid], user_profile, 'phrase') for pid in phrase_ids)
+            score += sum(legacy_evaluate_item(groups[gid], user_profile, 'group') for gid in group_ids)
+            scored.append((score, word_ids, phrase_ids, group_ids))
+        scored.sort(key=lambda x: x[0])
+        survivors = scored[:population_size//2]
+        new_population = []
+        for _ in range(population_size):
+            parent1 = random.choice(survivors)
+            parent2 = random.choice(survivors)
+            def crossover(a, b, n, pool):
+                cut = random.randint(1, n-1) if n > 1 else 1
+                child = list(set(a[:cut] + b[cut:]))
+                if random.random() < 0.2:
+                    if random.random() < 0.5 and len(child) > 1:
+                        child.pop(random.randint(0, len(child)-1))
+                    else:
+                        available = set(pool) - set(child)
+                        if available:
+                            child.append(random.choice(list(available)))
+                while len(child) > n:
+                    child.pop(random.randint(0, len(child)-1))
+                available = set(pool) - set(child)
+                while len(child) < n and available:
+                    child.append(random.choice(list(available)))
+                    available = set(pool) - set(child)
+                return list(set(child))
+            child_word_ids = crossover(parent1[1], parent2[1], n_words, words.keys())
+            child_phrase_ids = crossover(parent1[2], parent2[2], n_phrases, phrases.keys())
+            child_group_ids = crossover(parent1[3], parent2[3], n_groups, groups.keys())
+            new_population.append((child_word_ids, child_phrase_ids, child_group_ids))
+        population = new_population
+    best = min(population, key=lambda ids: (
+        sum(legacy_evaluate_item(words[wid], user_profile, 'word') for wid in ids[0]) +
+        sum(legacy_evaluate_item(phrases[pid], user_profile, 'phrase') for pid in ids[1]) +
+        sum(legacy_evaluate_item(groups[gid], user_profile, 'group') for gid in ids[2])
+    ))
+    return best[0], best[1], best[2]
+
+def synthetic_pool(size, size_fields, rng):
+    items = {}
+    for item_id in range(1, size + 1):
+        item = SimpleNamespace(
+            id=item_id,
+            categories=[rng.randint(1, 40) for _ in range(rng.randint(0, 3))] or None,
+            level=rng.choice(LEVELS + [None]),
+            frequency=rng.choice([None, rng.uniform(0, 20)]),
+        )
+        for field in size_fields:
+            setattr(item, field, rng.randint(0, 6))
+        items[item_id] = item
+    return items
+
+def pool_arrays(items, size_fields, user_profile):
+    rows = list(items.values())
+    sizes = np.array([sum(getattr(r, f) for f in size_fields) for r in rows], dtype=np.float64)
+    return np.array([r.id for r in rows]), item_scores(rows, sizes, user_profile)
+
+def run_benchmark(pool_size, population_size, generations, set_size, seed):
+    rng = random.Random(seed)
+    user_profile = SimpleNamespace(categories=[1, 2, 3, 4, 5], current_level="B1")
+    fields = [["component_count", "value_count"], ["word_count", "value_count"], ["member_count"]]
+    pools = [synthetic_pool(pool_size, f, rng) for f in fields]
+
+    random.seed(seed)
+    started = time.perf_counter()
+    legacy_best = legacy_genetic_algorithm(*pools, user_profile, population_size, generations, set_size)
+    legacy_seconds = time.perf_counter() - started
+    legacy_score = sum(
+        legacy_evaluate_item(pool[i], user_profile, type_)
+        for pool, ids, type_ in zip(pools, legacy_best, ["word", "phrase", "group"]) for i in ids
+    )
+
+    started = time.perf_counter()
+    arrays = [pool_arrays(pool, f, user_profile) for pool, f in zip(pools, fields)]
+    n_words = int(set_size * 0.4)
+    n_phrases = int(set_size * 0.4)
+    best = evolve([scores for _, scores in arrays], [n_words, n_phrases, set_size - n_words - n_phrases], population_size, generations, np.random.default_rng(seed))
+    vectorized_seconds = time.perf_counter() - started
+    vectorized_score = sum(float(scores[indices].sum()) for (_, scores), indices in zip(arrays, best))
+
+    print(
+        f"pool={pool_size:>7} legacy={legacy_seconds:8.3f}s (score {legacy_score:.1f}) "
+        f"vectorized={vectorized_seconds:8.3f}s (score {vectorized_score:.1f}) "
+        f"speedup={legacy_seconds / vectorized_seconds:6.1f}x"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized study-set genetic algorithm against the legacy implementation.")
+    parser.add_argument("--pool-sizes", default="10000,100000")
+    parser.add_argument("--population-size", type=int, default=30)
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--set-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for pool_size in (int(s) for s in args.pool_sizes.split(",")):
+        run_benchmark(pool_size, args.population_size, args.generations, args.set_size, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import sys
+from datetime import date
+from sqlalchemy import text
+from ..database import SessionLocal
+
+MONTHS_AHEAD = 12
+DEFAULT_PARTITION = "user_answer_attempts_default"
+
+def month_start(year, month):
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return date(year, month, 1)
+
+def create_partition(db, name, start, end):
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+    bounds = {"start": start, "end": end}
+    db.execute(text("LOCK TABLE user_answer_attempts IN ACCESS EXCLUSIVE MODE"))
+    in_default = db.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+    ), bounds).scalar()
+    if in_default:
+        db.execute(text(f"ALTER TABLE user_answer_attempts DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.execute(text(
+        f"CREATE TABLE {name} PARTITION OF user_answer_attempts "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    if in_default:
+        moved = db.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds).rowcount
+        db.execute(text(f"ALTER TABLE user_answer_attempts ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+        print(f"Moved {moved} attempts from {DEFAULT_PARTITION} into {name}")
+    return True
+
+def create_attempt_partitions(months_ahead=MONTHS_AHEAD):
+    db = SessionLocal()
+    try:
+        today = date.today()
+        created = 0
+        for offset in range(months_ahead + 1):
+            start = month_start(today.year, today.month + offset)
+            end = month_start(start.year, start.month + 1)
+            created += create_partition(db, f"user_answer_attempts_y{start.year}m{start.month:02d}", start, end)
+            db.commit()
+        print(f"Attempt partitions ensured up to {months_ahead} months ahead, {created} created")
+    except Exception as e:
+        db.rollback()
+        print(f"Error creating attempt partitions: {e}", file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    create_attempt_partitions()
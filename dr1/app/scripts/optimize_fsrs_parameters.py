@@ -0,0 +1,103 @@
+import argparse
+import importlib.util
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from itertools import groupby
+from fsrs import Optimizer, Rating, ReviewLog
+from sqlalchemy import text
+from ..database import SessionLocal
+from .. import models
+
+MIN_REVIEWS = 512
+USER_BATCH_SIZE = 50
+
+SELECT_USERS = text("""
+SELECT user_id
+FROM user_review_logs
+WHERE (CAST(:user_id AS INTEGER) IS NULL OR user_id = :user_id)
+GROUP BY user_id
+HAVING count(*) >= :min_reviews
+ORDER BY user_id
+""")
+
+SELECT_LOGS = text("""
+SELECT l.user_id, c.id AS card_id, l.rating, l.review_datetime, l.review_duration
+FROM user_review_logs l
+JOIN user_card_reviews c ON c.user_id = l.user_id AND c.item_type = l.item_type AND c.item_id = l.item_id
+WHERE l.user_id = ANY(:user_ids)
+ORDER BY l.user_id, l.review_datetime, l.id
+""")
+
+def fit_user_parameters(args):
+    user_id, logs = args
+    review_logs = [
+        ReviewLog(card_id=card_id, rating=Rating(rating), review_datetime=review_datetime, review_duration=review_duration)
+        for card_id, rating, review_datetime, review_duration in logs
+    ]
+    parameters = Optimizer(review_logs).compute_optimal_parameters()
+    return user_id, [float(p) for p in parameters]
+
+def load_user_logs(db, user_ids):
+    rows = db.execute(SELECT_LOGS, {"user_ids": user_ids})
+    return [
+        (user_id, [(r.card_id, r.rating, r.review_datetime.astimezone(timezone.utc), r.review_duration) for r in user_rows])
+        for user_id, user_rows in groupby(rows, key=lambda r: r.user_id)
+    ]
+
+def save_parameters(db, user_id, parameters):
+    return db.query(models.Profile).filter(models.Profile.user_id == user_id).update({
+        models.Profile.fsrs_parameters: parameters,
+        models.Profile.fsrs_parameters_updated_at: datetime.now(timezone.utc)
+    }, synchronize_session=False)
+
+def optimize_fsrs_parameters(min_reviews=MIN_REVIEWS, workers=1, user_id=None, dry_run=False):
+    if importlib.util.find_spec("torch") is None:
+        print("The fsrs optimizer needs torch, install requirements-optimizer.txt to fit parameters")
+        raise SystemExit(1)
+    db = SessionLocal()
+    started = time.monotonic()
+    fitted = 0
+    failed = 0
+    skipped = 0
+    try:
+        user_ids = db.execute(SELECT_USERS, {"user_id": user_id, "min_reviews": min_reviews}).scalars().all()
+        print(f"Fitting FSRS parameters for {len(user_ids)} users with at least {min_reviews} reviews")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for start in range(0, len(user_ids), USER_BATCH_SIZE):
+                futures = [pool.submit(fit_user_parameters, job) for job in load_user_logs(db, user_ids[start:start + USER_BATCH_SIZE])]
+                for future in as_completed(futures):
+                    try:
+                        fitted_user_id, parameters = future.result()
+                    except Exception:
+                        logging.exception("FSRS optimization failed for a user")
+                        failed += 1
+                        continue
+                    if not dry_run and not save_parameters(db, fitted_user_id, parameters):
+                        logging.warning(f"User {fitted_user_id} has no profile, parameters not saved")
+                        skipped += 1
+                        continue
+                    fitted += 1
+                    print(f"User {fitted_user_id}: {', '.join(f'{p:.4f}' for p in parameters)}")
+                if not dry_run:
+                    db.commit()
+        print(f"Done: {fitted} users fitted, {failed} failed, {skipped} without a profile in {time.monotonic() - started:.1f}s")
+    except Exception as e:
+        print(f"Error optimizing FSRS parameters: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit personal FSRS parameters from each user's review logs.")
+    parser.add_argument("--min-reviews", type=int, default=MIN_REVIEWS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    optimize_fsrs_parameters(args.min_reviews, args.workers, args.user_id, args.dry_run)
+
+if __name__ == "__main__":
+    main()
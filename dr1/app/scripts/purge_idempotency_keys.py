@@ -0,0 +1,16 @@
+from ..database import SessionLocal
+from ..services.idempotency_service import purge_expired_idempotency_keys
+
+def purge_idempotency_keys():
+    db = SessionLocal()
+    try:
+        deleted = purge_expired_idempotency_keys(db)
+        print(f"Deleted {deleted} expired idempotency keys")
+    except Exception as e:
+        print(f"Error purging idempotency keys: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    purge_idempotency_keys()
@@ -0,0 +1,32 @@
+from ..database import SessionLocal
+from .. import models
+from ..services.accepted_answer_service import rebuild_accepted_answers
+
+BATCH_SIZE = 1000
+
+def rebuild_all(db, item_type, model):
+    last_id = 0
+    total = 0
+    while True:
+        ids = [row.id for row in db.query(model.id).filter(model.id > last_id).order_by(model.id).limit(BATCH_SIZE)]
+        if not ids:
+            break
+        rebuild_accepted_answers(db, item_type, ids)
+        db.commit()
+        last_id = ids[-1]
+        total += len(ids)
+    print(f"Rebuilt accepted answers for {total} {item_type}s")
+
+def rebuild_accepted_answer_index():
+    db = SessionLocal()
+    try:
+        rebuild_all(db, "word", models.Word)
+        rebuild_all(db, "phrase", models.Phrase)
+    except Exception as e:
+        print(f"Error rebuilding accepted answers: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_accepted_answer_index()
@@ -0,0 +1,254 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta, timezone
+import numpy as np
+from fsrs import Scheduler, Card, Rating, State
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from ..config import settings
+from ..database import SessionLocal
+from ..services.due_queue import publish_due_queue_reset
+from ..services.retrievability_service import next_interval
+
+LOCK_TIMEOUT = "2s"
+MAX_CHUNK_RETRIES = 3
+
+SELECT_CHUNK = text("""
+SELECT id, user_id, item_type, item_id, stability, state, last_review_at
+FROM user_card_reviews
+WHERE id > :last_id AND is_review AND stability IS NOT NULL
+ORDER BY id
+LIMIT :limit
+""")
+
+SELECT_CARDS = text("""
+SELECT id, user_id, item_type, item_id, stability, state, last_review_at
+FROM user_card_reviews
+WHERE id = ANY(:ids) AND is_review AND stability IS NOT NULL
+ORDER BY id
+""")
+
+SELECT_CHUNK_LOGS = text("""
+SELECT c.id AS card_id, l.rating, l.review_datetime, l.review_duration
+FROM user_card_reviews c
+JOIN user_review_logs l ON l.user_id = c.user_id AND l.item_type = c.item_type AND l.item_id = c.item_id
+WHERE c.id = ANY(:ids)
+ORDER BY c.id, l.review_datetime, l.id
+""")
+
+SELECT_USER_PARAMETERS = text("""
+SELECT user_id, fsrs_parameters FROM profiles
+WHERE user_id = ANY(:user_ids) AND fsrs_parameters IS NOT NULL
+""")
+
+def read_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    return 0
+
+def write_checkpoint(path, last_id):
+    if path:
+        with open(path, "w") as f:
+            f.write(str(last_id))
+
+def recompute_due_dates(rows, desired_retention, maximum_interval):
+    rows = [r for r in rows if r.state == int(State.Review) and r.last_review_at is not None]
+    if not rows:
+        return []
+    stability = np.fromiter((r.stability for r in rows), dtype=np.float64, count=len(rows))
+    intervals = next_interval(stability, desired_retention, maximum_interval)
+    return [
+        {"id": r.id, "due_at": (r.last_review_at + timedelta(days=int(days))).isoformat()}
+        for r, days in zip(rows, intervals)
+    ]
+
+def replay_card_logs(args):
+    desired_retention, maximum_interval, cards = args
+    schedulers = {}
+    results = []
+    for card_id, parameters, logs in cards:
+        if parameters not in schedulers:
+            scheduler_kwargs = {"desired_retention": desired_retention, "maximum_interval": maximum_interval, "enable_fuzzing": False}
+            if parameters:
+                scheduler_kwargs["parameters"] = parameters
+            schedulers[parameters] = Scheduler(**scheduler_kwargs)
+        scheduler = schedulers[parameters]
+        card = Card(card_id=card_id)
+        for rating, review_datetime, review_duration in logs:
+            card, _ = scheduler.review_card(card, Rating(rating), review_datetime=review_datetime, review_duration=review_duration)
+        results.append({
+            "id": card_id,
+            "due_at": card.due.isoformat(),
+            "card_json": card.to_dict(),
+            "state": int(card.state),
+            "stability": card.stability,
+            "difficulty": card.difficulty,
+            "last_review_at": card.last_review.isoformat() if card.last_review else None,
+        })
+    return results
+
+def update_due_dates(db, updates, read_last_review):
+    values = ", ".join(
+        f"(CAST(:id_{i} AS INTEGER), CAST(:due_{i} AS TEXT), CAST(:read_{i} AS TIMESTAMPTZ))" for i in range(len(updates))
+    )
+    params = {}
+    for i, update in enumerate(updates):
+        params[f"id_{i}"] = update["id"]
+        params[f"due_{i}"] = update["due_at"]
+        params[f"read_{i}"] = read_last_review[update["id"]]
+    return db.execute(text(
+        "UPDATE user_card_reviews AS r SET due_at = CAST(v.due AS TIMESTAMPTZ), "
+        "card_json = jsonb_set(r.card_json, '{due}', to_jsonb(v.due)) "
+        f"FROM (VALUES {values}) AS v(id, due, read_last_review_at) "
+        "WHERE r.id = v.id AND r.last_review_at IS NOT DISTINCT FROM v.read_last_review_at RETURNING r.id"
+    ), params).scalars().all()
+
+def update_replayed_cards(db, updates, read_last_review):
+    values = ", ".join(
+        f"(CAST(:id_{i} AS INTEGER), CAST(:due_{i} AS TIMESTAMPTZ), CAST(:card_{i} AS JSONB), CAST(:state_{i} AS INTEGER), "
+        f"CAST(:stability_{i} AS DOUBLE PRECISION), CAST(:difficulty_{i} AS DOUBLE PRECISION), CAST(:last_review_{i} AS TIMESTAMPTZ), "
+        f"CAST(:read_{i} AS TIMESTAMPTZ))"
+        for i in range(len(updates))
+    )
+    params = {}
+    for i, update in enumerate(updates):
+        params[f"id_{i}"] = update["id"]
+        params[f"read_{i}"] = read_last_review[update["id"]]
+        params[f"due_{i}"] = update["due_at"]
+        params[f"card_{i}"] = json.dumps(update["card_json"])
+        params[f"state_{i}"] = update["state"]
+        params[f"stability_{i}"] = update["stability"]
+        params[f"difficulty_{i}"] = update["difficulty"]
+        params[f"last_review_{i}"] = update["last_review_at"]
+    return db.execute(text(
+        "UPDATE user_card_reviews AS r SET due_at = v.due_at, card_json = v.card_json, state = v.state, "
+        "stability = v.stability, difficulty = v.difficulty, last_review_at = v.last_review_at "
+        f"FROM (VALUES {values}) AS v(id, due_at, card_json, state, stability, difficulty, last_review_at, read_last_review_at) "
+        "WHERE r.id = v.id AND r.last_review_at IS NOT DISTINCT FROM v.read_last_review_at RETURNING r.id"
+    ), params).scalars().all()
+
+def load_chunk_logs(db, ids):
+    logs = {card_id: [] for card_id in ids}
+    for row in db.execute(SELECT_CHUNK_LOGS, {"ids": ids}):
+        logs[row.card_id].append((row.rating, row.review_datetime.astimezone(timezone.utc), row.review_duration))
+    return [(card_id, card_logs) for card_id, card_logs in logs.items() if card_logs]
+
+def load_user_parameters(db, user_ids):
+    rows = db.execute(SELECT_USER_PARAMETERS, {"user_ids": list(user_ids)})
+    return {row.user_id: tuple(row.fsrs_parameters) for row in rows}
+
+def compute_updates(db, rows, desired_retention, maximum_interval, replay, parameters, pool, workers):
+    if not replay:
+        return recompute_due_dates(rows, desired_retention, maximum_interval)
+    card_users = {r.id: r.user_id for r in rows}
+    user_parameters = load_user_parameters(db, set(card_users.values()))
+    cards = [
+        (card_id, user_parameters.get(card_users[card_id], parameters), logs)
+        for card_id, logs in load_chunk_logs(db, list(card_users))
+    ]
+    slices = [cards[i::workers] for i in range(workers)] if pool else [cards]
+    jobs = [(desired_retention, maximum_interval, part) for part in slices if part]
+    results = pool.map(replay_card_logs, jobs) if pool else map(replay_card_logs, jobs)
+    return [update for part in results for update in part]
+
+def write_updates(db, rows, updates, replay):
+    read_last_review = {r.id: r.last_review_at for r in rows}
+    for attempt in range(MAX_CHUNK_RETRIES):
+        try:
+            db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            written = (update_replayed_cards if replay else update_due_dates)(db, updates, read_last_review) if updates else []
+            db.commit()
+            return set(written)
+        except OperationalError:
+            db.rollback()
+            if attempt == MAX_CHUNK_RETRIES - 1:
+                raise
+            logging.warning(f"Lock timeout on chunk starting at id {rows[0].id}, retrying")
+            time.sleep(1 + attempt)
+
+def reschedule_chunk(db, rows, desired_retention, maximum_interval, replay, parameters, pool, workers):
+    updated = 0
+    for _ in range(MAX_CHUNK_RETRIES):
+        updates = compute_updates(db, rows, desired_retention, maximum_interval, replay, parameters, pool, workers)
+        written = write_updates(db, rows, updates, replay)
+        updated += len(written)
+        conflicted = [u["id"] for u in updates if u["id"] not in written]
+        if not conflicted:
+            return updated, 0
+        logging.info(f"{len(conflicted)} cards were reviewed while being rescheduled, recomputing them")
+        rows = db.execute(SELECT_CARDS, {"ids": conflicted}).all()
+        db.commit()
+        if not rows:
+            return updated, 0
+    return updated, len(rows)
+
+def reschedule_cards(desired_retention, maximum_interval, batch_size, start_after=0, checkpoint=None, replay=False, parameters=None, workers=1):
+    db = SessionLocal()
+    pool = ProcessPoolExecutor(max_workers=workers) if replay and workers > 1 else None
+    last_id = max(start_after, read_checkpoint(checkpoint))
+    processed = 0
+    updated = 0
+    skipped = 0
+    started = time.monotonic()
+    try:
+        while True:
+            rows = db.execute(SELECT_CHUNK, {"last_id": last_id, "limit": batch_size}).all()
+            db.commit()
+            if not rows:
+                break
+            chunk_started = time.monotonic()
+            chunk_updated, chunk_skipped = reschedule_chunk(
+                db, rows, desired_retention, maximum_interval, replay, parameters, pool, workers
+            )
+            if chunk_skipped:
+                logging.warning(f"Skipped {chunk_skipped} cards in chunk up to id {rows[-1].id} that were reviewed during every retry")
+            last_id = rows[-1].id
+            write_checkpoint(checkpoint, last_id)
+            processed += len(rows)
+            updated += chunk_updated
+            skipped += chunk_skipped
+            elapsed = time.monotonic() - chunk_started
+            total_elapsed = time.monotonic() - started
+            print(
+                f"Rescheduled chunk up to id {last_id}: {chunk_updated}/{len(rows)} cards in {elapsed:.2f}s "
+                f"({len(rows) / elapsed if elapsed else 0:.0f} cards/s, total {processed} cards, "
+                f"{processed / total_elapsed if total_elapsed else 0:.0f} cards/s)"
+            )
+        publish_due_queue_reset(db)
+        db.commit()
+        print(f"Done: {updated} of {processed} cards rescheduled, {skipped} skipped in {time.monotonic() - started:.1f}s")
+    finally:
+        if pool:
+            pool.shutdown()
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute FSRS due dates for all review cards after scheduler parameter changes.")
+    parser.add_argument("--desired-retention", type=float, default=settings.FSRS_DESIRED_RETENTION)
+    parser.add_argument("--maximum-interval", type=int, default=settings.FSRS_MAXIMUM_INTERVAL)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--start-after", type=int, default=0, help="Only process cards with id greater than this")
+    parser.add_argument("--checkpoint", help="File that stores the last processed id so an interrupted run can resume")
+    parser.add_argument("--replay", action="store_true", help="Replay review logs to rebuild stability and difficulty (needed after weight changes)")
+    parser.add_argument("--parameters", help="Comma separated FSRS weights used with --replay for users without fitted parameters")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes used with --replay")
+    args = parser.parse_args()
+    parameters = tuple(float(p) for p in args.parameters.split(",")) if args.parameters else None
+    reschedule_cards(
+        args.desired_retention,
+        args.maximum_interval,
+        args.batch_size,
+        start_after=args.start_after,
+        checkpoint=args.checkpoint,
+        replay=args.replay,
+        parameters=parameters,
+        workers=args.workers
+    )
+
+if __name__ == "__main__":
+    main()
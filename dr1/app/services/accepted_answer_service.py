@@ -0,0 +1,89 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from .. import models
+from app.utils.text_normalization import fold_answer
+
+GENDER_ARTICLES = {
+    "m": "der", "masculine": "der", "der": "der",
+    "f": "die", "feminine": "die", "die": "die",
+    "n": "das", "neuter": "das", "das": "das",
+}
+
+def word_variants(word):
+    if not word.text:
+        return set()
+    text = word.text.strip()
+    bases = {text}
+    if word.reflexivity:
+        bare = text[5:] if text.lower().startswith("sich ") else text
+        bases.update({bare, f"sich {bare}"})
+    variants = set(bases)
+    article = GENDER_ARTICLES.get((word.gender or "").strip().lower())
+    if article:
+        variants.update(f"{article} {base}" for base in bases)
+    return {fold_answer(v) for v in variants} - {""}
+
+def phrase_variants(phrase):
+    return {fold_answer(phrase.canonical_text)} if phrase.canonical_text else set()
+
+def rebuild_accepted_answers(db: Session, item_type: str, item_ids):
+    item_ids = set(item_ids)
+    if not item_ids:
+        return
+    db.query(models.AcceptedAnswer).filter(
+        models.AcceptedAnswer.item_type == item_type,
+        models.AcceptedAnswer.item_id.in_(item_ids),
+        models.AcceptedAnswer.source == "generated"
+    ).delete(synchronize_session=False)
+    if item_type == "word":
+        items = db.query(models.Word).filter(models.Word.id.in_(item_ids))
+        variants = {word.id: word_variants(word) for word in items}
+    else:
+        items = db.query(models.Phrase).filter(models.Phrase.id.in_(item_ids))
+        variants = {phrase.id: phrase_variants(phrase) for phrase in items}
+    rows = [
+        {"item_type": item_type, "item_id": item_id, "answer_key": key, "source": "generated"}
+        for item_id, keys in variants.items() for key in keys
+    ]
+    if rows:
+        db.execute(insert(models.AcceptedAnswer).values(rows).on_conflict_do_nothing(
+            constraint="uq_accepted_answers_item_answer"
+        ))
+
+def delete_accepted_answers(db: Session, item_type: str, item_id: int):
+    db.query(models.AcceptedAnswer).filter(
+        models.AcceptedAnswer.item_type == item_type,
+        models.AcceptedAnswer.item_id == item_id
+    ).delete(synchronize_session=False)
+
+def is_accepted_answer(db: Session, item_type: str, item_id: int, answer: str):
+    key = fold_answer(answer)
+    if not key:
+        return False
+    return db.query(models.AcceptedAnswer.id).filter(
+        models.AcceptedAnswer.item_type == item_type,
+        models.AcceptedAnswer.item_id == item_id,
+        models.AcceptedAnswer.answer_key == key
+    ).first() is not None
+
+def get_accepted_answers(db: Session, item_type: str, item_id: int):
+    return db.query(models.AcceptedAnswer).filter(
+        models.AcceptedAnswer.item_type == item_type,
+        models.AcceptedAnswer.item_id == item_id
+    ).order_by(models.AcceptedAnswer.source, models.AcceptedAnswer.answer_key).all()
+
+def add_accepted_answer(db: Session, item_type: str, item_id: int, answer: str):
+    key = fold_answer(answer)
+    db.execute(insert(models.AcceptedAnswer).values(
+        item_type=item_type, item_id=item_id, answer_key=key, source="admin"
+    ).on_conflict_do_update(
+        constraint="uq_accepted_answers_item_answer",
+        set_={"source": "admin"}
+    ))
+    db.commit()
+    return db.query(models.AcceptedAnswer).filter_by(item_type=item_type, item_id=item_id, answer_key=key).first()
+
+def remove_accepted_answer(db: Session, answer_id: int):
+    deleted = db.query(models.AcceptedAnswer).filter(models.AcceptedAnswer.id == answer_id).delete(synchronize_session=False)
+    db.commit()
+    return deleted > 0
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from .. import models
+from app.config import settings
+from app.utils.text_normalization import normalize_answer
+
+class AnalysisLRUCache:
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+memory_cache = AnalysisLRUCache(settings.GEMINI_CACHE_SIZE, settings.GEMINI_CACHE_TTL_SECONDS)
+stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+stats_lock = threading.Lock()
+pending_hits = {}
+HIT_FLUSH_SIZE = 100
+
+def record(counter):
+    with stats_lock:
+        stats[counter] += 1
+
+def record_hit(key):
+    with stats_lock:
+        hits, _ = pending_hits.get(key, (0, None))
+        pending_hits[key] = (hits + 1, datetime.utcnow())
+        return sum(hits for hits, _ in pending_hits.values())
+
+def flush_hits(db):
+    global pending_hits
+    with stats_lock:
+        hits, pending_hits = pending_hits, {}
+    if not hits:
+        return
+    values = ", ".join(
+        f"(CAST(:correct_{i} AS TEXT), CAST(:user_{i} AS TEXT), CAST(:hits_{i} AS INTEGER), CAST(:last_hit_{i} AS TIMESTAMP))"
+        for i in range(len(hits))
+    )
+    params = {}
+    for i, ((correct_key, user_key), (count, last_hit_at)) in enumerate(hits.items()):
+        params[f"correct_{i}"] = correct_key
+        params[f"user_{i}"] = user_key
+        params[f"hits_{i}"] = count
+        params[f"last_hit_{i}"] = last_hit_at
+    db.execute(text(
+        "UPDATE gemini_analysis_cache AS c SET hit_count = c.hit_count + v.hits, "
+        "last_hit_at = GREATEST(c.last_hit_at, v.last_hit_at) "
+        f"FROM (VALUES {values}) AS v(correct_answer_key, user_answer_key, hits, last_hit_at) "
+        "WHERE c.correct_answer_key = v.correct_answer_key AND c.user_answer_key = v.user_answer_key"
+    ), params)
+
+def cache_key(correct_answer, user_answer):
+    return normalize_answer(correct_answer), normalize_answer(user_answer)
+
+def get_cached_analysis(db, correct_answer, user_answer):
+    key = cache_key(correct_answer, user_answer)
+    analysis = memory_cache.get(key)
+    if analysis is not None:
+        record("memory_hits")
+        if record_hit(key) >= HIT_FLUSH_SIZE:
+            flush_hits(db)
+    else:
+        entry = db.query(models.GeminiAnalysisCache).filter(
+            models.GeminiAnalysisCache.correct_answer_key == key[0],
+            models.GeminiAnalysisCache.user_answer_key == key[1]
+        ).first()
+        if entry is None:
+            record("misses")
+            return None
+        record("db_hits")
+        analysis = {"error_analysis": entry.error_analysis, "brief_explanation": entry.brief_explanation}
+        memory_cache.set(key, analysis)
+        record_hit(key)
+        flush_hits(db)
+    return analysis
+
+def store_cached_analysis(db, correct_answer, user_answer, analysis):
+    if analysis.get("is_fallback"):
+        return
+    key = cache_key(correct_answer, user_answer)
+    value = {"error_analysis": analysis["error_analysis"], "brief_explanation": analysis["brief_explanation"]}
+    stmt = insert(models.GeminiAnalysisCache).values(
+        correct_answer_key=key[0],
+        user_answer_key=key[1],
+        error_analysis=value["error_analysis"],
+        brief_explanation=value["brief_explanation"],
+        created_at=datetime.utcnow()
+    ).on_conflict_do_update(
+        constraint="uq_gemini_analysis_cache_key",
+        set_={"error_analysis": value["error_analysis"], "brief_explanation": value["brief_explanation"]}
+    )
+    db.execute(stmt)
+    memory_cache.set(key, value)
+
+def get_cache_stats(db):
+    flush_hits(db)
+    db.commit()
+    with stats_lock:
+        counters = dict(stats)
+    lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"]
+    hits = counters["memory_hits"] + counters["db_hits"]
+    entries, total_hits = db.query(
+        func.count(models.GeminiAnalysisCache.id),
+        func.coalesce(func.sum(models.GeminiAnalysisCache.hit_count), 0)
+    ).one()
+    return {
+        "process": {
+            **counters,
+            "lookups": lookups,
+            "hit_rate": hits / lookups if lookups else None,
+            "memory_entries": len(memory_cache)
+        },
+        "database": {
+            "entries": entries,
+            "total_hits": int(total_hits)
+        }
+    }
+
+def purge_analysis_cache(db):
+    deleted = db.query(models.GeminiAnalysisCache).delete(synchronize_session=False)
+    db.commit()
+    memory_cache.clear()
+    return deleted
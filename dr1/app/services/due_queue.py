@@ -0,0 +1,145 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from .. import models
+from app.config import settings
+from app.services.pg_notifications import notify, subscribe, on_connect
+
+CHANNEL = "card_due_updates"
+NOTIFY_CHUNK_SIZE = 100
+
+class UserDueQueue:
+    def __init__(self, cards):
+        self.due = {(item_type, item_id): due for due, item_type, item_id in cards}
+        self.heap = list(cards)
+        heapq.heapify(self.heap)
+        self.last_access = time.monotonic()
+
+    def update(self, item_type, item_id, due):
+        key = (item_type, item_id)
+        if due is None:
+            self.due.pop(key, None)
+        elif self.due.get(key) != due:
+            self.due[key] = due
+            heapq.heappush(self.heap, (due, item_type, item_id))
+        if len(self.heap) > 2 * len(self.due) + 64:
+            self.heap = [(d, t, i) for (t, i), d in self.due.items()]
+            heapq.heapify(self.heap)
+
+    def due_items(self, now, count):
+        taken = []
+        while self.heap and len(taken) < count:
+            due, item_type, item_id = self.heap[0]
+            if self.due.get((item_type, item_id)) != due:
+                heapq.heappop(self.heap)
+                continue
+            if due > now:
+                break
+            taken.append(heapq.heappop(self.heap))
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return [(item_type, item_id) for _, item_type, item_id in taken]
+
+    def __len__(self):
+        return len(self.due)
+
+class DueQueueCache:
+    def __init__(self, max_cards, ttl_seconds):
+        self.max_cards = max_cards
+        self.ttl_seconds = ttl_seconds
+        self.queues = OrderedDict()
+        self.loading = {}
+        self.lock = threading.Lock()
+
+    def load(self, db, user_id):
+        rows = db.query(
+            models.UserCardReview.due_at,
+            models.UserCardReview.item_type,
+            models.UserCardReview.item_id
+        ).filter(
+            models.UserCardReview.user_id == user_id,
+            models.UserCardReview.is_review == True,
+            models.UserCardReview.due_at.isnot(None)
+        ).all()
+        return UserDueQueue([(r.due_at.timestamp(), r.item_type, r.item_id) for r in rows])
+
+    def get_due_items(self, db, user_id, count, now):
+        buffer = []
+        with self.lock:
+            queue = self.queues.get(user_id)
+            if queue is None:
+                self.loading.setdefault(user_id, []).append(buffer)
+        if queue is None:
+            loaded = self.load(db, user_id)
+            with self.lock:
+                queue = self.finish_load(user_id, buffer, loaded)
+        with self.lock:
+            queue.last_access = time.monotonic()
+            if user_id in self.queues:
+                self.queues.move_to_end(user_id)
+            return queue.due_items(now.timestamp(), count)
+
+    def finish_load(self, user_id, buffer, loaded):
+        buffers = self.loading.get(user_id, [])
+        registered = any(b is buffer for b in buffers)
+        remaining = [b for b in buffers if b is not buffer]
+        if remaining:
+            self.loading[user_id] = remaining
+        else:
+            self.loading.pop(user_id, None)
+        for item_type, item_id, due in buffer:
+            loaded.update(item_type, item_id, due)
+        if not registered:
+            return loaded
+        queue = self.queues.setdefault(user_id, loaded)
+        self.evict()
+        return queue
+
+    def apply_updates(self, user_id, cards):
+        with self.lock:
+            for buffer in self.loading.get(user_id, ()):
+                buffer.extend(cards)
+            queue = self.queues.get(user_id)
+            if queue is None:
+                return
+            for item_type, item_id, due in cards:
+                queue.update(item_type, item_id, due)
+
+    def evict(self):
+        expired_before = time.monotonic() - self.ttl_seconds
+        for user_id in [u for u, q in self.queues.items() if q.last_access < expired_before]:
+            del self.queues[user_id]
+        total = sum(len(q) for q in self.queues.values())
+        while total > self.max_cards and len(self.queues) > 1:
+            _, queue = self.queues.popitem(last=False)
+            total -= len(queue)
+
+    def clear(self):
+        with self.lock:
+            self.queues.clear()
+            self.loading.clear()
+
+due_queues = DueQueueCache(settings.DUE_QUEUE_MAX_CARDS, settings.DUE_QUEUE_TTL_SECONDS)
+
+def card_updates(reviews):
+    return [
+        (r.item_type, r.item_id, r.due_at.timestamp() if r.is_review and r.due_at else None)
+        for r in reviews
+    ]
+
+def publish_due_updates(db, user_id, cards):
+    for start in range(0, len(cards), NOTIFY_CHUNK_SIZE):
+        notify(db, CHANNEL, {"user_id": user_id, "cards": cards[start:start + NOTIFY_CHUNK_SIZE]})
+
+def publish_due_queue_reset(db):
+    notify(db, CHANNEL, {"reset": True})
+
+def on_due_updates(payload):
+    if payload.get("reset"):
+        due_queues.clear()
+        return
+    due_queues.apply_updates(payload["user_id"], [tuple(card) for card in payload["cards"]])
+
+subscribe(CHANNEL, on_due_updates)
+on_connect(due_queues.clear)
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+from .. import models
+from app.config import settings
+from app.services.pg_notifications import notify, subscribe
+
+CHANNEL = "error_analysis_done"
+
+class AnalysisSubscriber:
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+subscribers = {}
+subscribers_lock = threading.Lock()
+
+def add_subscriber(user_id):
+    subscriber = AnalysisSubscriber(user_id, asyncio.get_running_loop())
+    with subscribers_lock:
+        subscribers.setdefault(user_id, set()).add(subscriber)
+    return subscriber
+
+def remove_subscriber(subscriber):
+    with subscribers_lock:
+        user_subscribers = subscribers.get(subscriber.user_id)
+        if user_subscribers is None:
+            return
+        user_subscribers.discard(subscriber)
+        if not user_subscribers:
+            del subscribers[subscriber.user_id]
+
+def event_id(analyzed_at, error_id):
+    return f"{int(analyzed_at.timestamp() * 1_000_000)}-{error_id}"
+
+def parse_event_id(value):
+    try:
+        micros, error_id = value.split("-", 1)
+        return datetime.fromtimestamp(int(micros) / 1_000_000, timezone.utc), int(error_id)
+    except (AttributeError, ValueError):
+        return None
+
+def analysis_event(error):
+    return {
+        "id": event_id(error.analyzed_at, error.id),
+        "user_id": error.user_id,
+        "error_id": error.id,
+        "item_type": error.item_type,
+        "item_id": error.item_id,
+        "error_analysis": error.error_analysis,
+        "brief_explanation": error.brief_explanation,
+        "analyzed_at": error.analyzed_at.isoformat()
+    }
+
+def publish_analysis_done(db, error):
+    event = analysis_event(error)
+    notify(db, CHANNEL, event)
+    return event
+
+def deliver_analysis_event(event):
+    with subscribers_lock:
+        targets = list(subscribers.get(event["user_id"], ()))
+    for subscriber in targets:
+        subscriber.loop.call_soon_threadsafe(subscriber.put, event)
+
+def events_since(db, user_id, since, limit=None):
+    analyzed_at, error_id = since
+    rows = db.query(models.UserAnswerError).filter(
+        models.UserAnswerError.user_id == user_id,
+        models.UserAnswerError.analyzed_at.isnot(None),
+        (models.UserAnswerError.analyzed_at > analyzed_at) | (
+            (models.UserAnswerError.analyzed_at == analyzed_at) & (models.UserAnswerError.id > error_id)
+        )
+    ).order_by(
+        models.UserAnswerError.analyzed_at, models.UserAnswerError.id
+    ).limit(limit or settings.SSE_REPLAY_LIMIT).all()
+    return [analysis_event(row) for row in rows]
+
+subscribe(CHANNEL, deliver_analysis_event)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_
+from .. import models
+from app.config import settings
+from app.database import SessionLocal
+from app.utils.gemini import analyze_error_with_gemini
+from app.services.analysis_cache_service import get_cached_analysis, store_cached_analysis
+from app.services.error_analysis_events import publish_analysis_done, deliver_analysis_event
+
+queue = None
+workers = []
+
+class AnalysisUnavailable(Exception):
+    pass
+
+def enqueue_error_analysis(error_id):
+    if queue is None:
+        logging.warning(f"Error analysis queue is not running, error {error_id} stays pending")
+        return
+    queue.put_nowait(error_id)
+
+def complete_error_analysis(db, error, analysis):
+    error.error_analysis = analysis["error_analysis"]
+    error.brief_explanation = analysis["brief_explanation"]
+    error.analysis_status = "done"
+    error.analyzed_at = datetime.now(timezone.utc)
+    event = publish_analysis_done(db, error)
+    db.commit()
+    deliver_analysis_event(event)
+
+def claim_error(db, error_id):
+    lease_expired = datetime.now(timezone.utc) - timedelta(seconds=settings.GEMINI_ANALYSIS_LEASE_SECONDS)
+    return db.query(models.UserAnswerError).filter(
+        models.UserAnswerError.id == error_id,
+        or_(
+            models.UserAnswerError.analysis_status == "pending",
+            (models.UserAnswerError.analysis_status == "running") & (models.UserAnswerError.analysis_claimed_at < lease_expired)
+        )
+    ).update({
+        models.UserAnswerError.analysis_status: "running",
+        models.UserAnswerError.analysis_claimed_at: datetime.now(timezone.utc),
+        models.UserAnswerError.analysis_attempts: models.UserAnswerError.analysis_attempts + 1
+    }, synchronize_session=False)
+
+def load_pending_error(error_id):
+    db = SessionLocal()
+    try:
+        if not claim_error(db, error_id):
+            db.rollback()
+            return None
+        db.commit()
+        error = db.query(models.UserAnswerError).filter(models.UserAnswerError.id == error_id).first()
+        analysis = get_cached_analysis(db, error.correct_answer, error.user_answer)
+        if analysis is not None:
+            complete_error_analysis(db, error, analysis)
+            return None
+        return error.correct_answer, error.user_answer, error.analysis_attempts
+    finally:
+        db.close()
+
+def save_error_analysis(error_id, analysis):
+    db = SessionLocal()
+    try:
+        error = db.query(models.UserAnswerError).filter(
+            models.UserAnswerError.id == error_id,
+            models.UserAnswerError.analysis_status == "running"
+        ).first()
+        if error is None:
+            return
+        store_cached_analysis(db, error.correct_answer, error.user_answer, analysis)
+        complete_error_analysis(db, error, analysis)
+    finally:
+        db.close()
+
+def release_failed_error(error_id):
+    db = SessionLocal()
+    try:
+        error = db.query(models.UserAnswerError).filter(
+            models.UserAnswerError.id == error_id,
+            models.UserAnswerError.analysis_status == "running"
+        ).first()
+        if error is None:
+            return None
+        error.analysis_status = "pending" if error.analysis_attempts < settings.GEMINI_ANALYSIS_MAX_ATTEMPTS else "failed"
+        db.commit()
+        return error.analysis_status, error.analysis_attempts
+    finally:
+        db.close()
+
+async def run_error_analysis(error_id):
+    pending = await asyncio.to_thread(load_pending_error, error_id)
+    if pending is None:
+        return
+    correct_answer, user_answer, attempts = pending
+    analysis = await analyze_error_with_gemini(correct_answer, user_answer)
+    if analysis.get("is_fallback") and attempts < settings.GEMINI_ANALYSIS_MAX_ATTEMPTS:
+        raise AnalysisUnavailable(f"Gemini returned no analysis on attempt {attempts}")
+    await asyncio.to_thread(save_error_analysis, error_id, analysis)
+
+def schedule_retry(error_id, attempts):
+    delay = settings.GEMINI_ANALYSIS_RETRY_SECONDS * 2 ** (attempts - 1)
+    asyncio.get_running_loop().call_later(delay, enqueue_error_analysis, error_id)
+    logging.warning(f"Error analysis failed for error {error_id}, retrying in {delay:.0f}s")
+
+async def analysis_worker():
+    while True:
+        error_id = await queue.get()
+        try:
+            await run_error_analysis(error_id)
+        except Exception as e:
+            if isinstance(e, AnalysisUnavailable):
+                logging.warning(f"Error analysis failed for error {error_id}: {e}")
+            else:
+                logging.exception(f"Error analysis failed for error {error_id}")
+            try:
+                released = await asyncio.to_thread(release_failed_error, error_id)
+            except Exception:
+                logging.exception(f"Could not release error {error_id}, it is retried after its lease expires")
+                released = None
+            if released is not None:
+                status, attempts = released
+                if status == "failed":
+                    logging.error(f"Error analysis for error {error_id} failed {attempts} times, marked failed")
+                else:
+                    schedule_retry(error_id, attempts)
+        finally:
+            queue.task_done()
+
+def pending_error_ids():
+    db = SessionLocal()
+    try:
+        rows = db.query(models.UserAnswerError.id).filter(
+            models.UserAnswerError.analysis_status.in_(("pending", "running"))
+        ).order_by(models.UserAnswerError.id).all()
+        return [row.id for row in rows]
+    finally:
+        db.close()
+
+async def start_error_analysis_workers():
+    global queue
+    queue = asyncio.Queue()
+    for error_id in await asyncio.to_thread(pending_error_ids):
+        queue.put_nowait(error_id)
+    for _ in range(settings.GEMINI_ANALYSIS_WORKERS):
+        workers.append(asyncio.create_task(analysis_worker()))
+    logging.info(f"Started {len(workers)} error analysis workers, {queue.qsize()} pending analyses requeued")
+
+async def stop_error_analysis_workers():
+    global queue
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    workers.clear()
+    queue = None
@@ -0,0 +1,29 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete
+from .. import models
+from app.config import settings
+
+def ticket_hash(ticket):
+    return hashlib.sha256(ticket.encode("utf-8")).hexdigest()
+
+def issue_event_ticket(db, user_id):
+    ticket = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    db.query(models.EventTicket).filter(models.EventTicket.expires_at < now).delete(synchronize_session=False)
+    db.add(models.EventTicket(
+        ticket_hash=ticket_hash(ticket),
+        user_id=user_id,
+        expires_at=now + timedelta(seconds=settings.SSE_TICKET_TTL_SECONDS)
+    ))
+    db.commit()
+    return {"ticket": ticket, "expires_in": settings.SSE_TICKET_TTL_SECONDS}
+
+def redeem_event_ticket(db, ticket):
+    user_id = db.execute(delete(models.EventTicket).where(
+        models.EventTicket.ticket_hash == ticket_hash(ticket),
+        models.EventTicket.expires_at >= datetime.now(timezone.utc)
+    ).returning(models.EventTicket.user_id)).scalar()
+    db.commit()
+    return user_id
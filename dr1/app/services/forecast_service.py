@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from .. import models
+
+def review_forecast(db, days, user_id=None, now=None):
+    now = now or datetime.now(timezone.utc)
+    today = now.date()
+    end = datetime(today.year, today.month, today.day, tzinfo=timezone.utc) + timedelta(days=days)
+    due_day = func.date(func.timezone("UTC", models.UserCardReview.due_at))
+    query = db.query(due_day.label("day"), func.count(models.UserCardReview.id).label("count")).filter(
+        models.UserCardReview.is_review == True,
+        models.UserCardReview.due_at < end
+    )
+    if user_id is not None:
+        query = query.filter(models.UserCardReview.user_id == user_id)
+    counts = [0] * days
+    overdue = 0
+    for day, count in query.group_by(due_day).all():
+        offset = (day - today).days
+        if offset < 0:
+            overdue += count
+        else:
+            counts[offset] += count
+    peak = max(range(days), key=lambda i: counts[i]) if days else None
+    return {
+        "overdue": overdue,
+        "total": overdue + sum(counts),
+        "peak": {"date": (today + timedelta(days=peak)).isoformat(), "count": counts[peak]} if peak is not None else None,
+        "days": [
+            {"date": (today + timedelta(days=i)).isoformat(), "count": counts[i]}
+            for i in range(days)
+        ]
+    }
@@ -0,0 +1,66 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert
+from .. import models
+from app.config import settings
+
+def request_hash(data):
+    return hashlib.sha256(data.model_dump_json().encode("utf-8")).hexdigest()
+
+def take_over_expired_claim(db, user_id, key):
+    lease_expired = datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    taken = db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.user_id == user_id,
+        models.IdempotencyKey.key == key,
+        models.IdempotencyKey.response.is_(None),
+        models.IdempotencyKey.created_at < lease_expired
+    ).update({models.IdempotencyKey.created_at: datetime.now(timezone.utc)}, synchronize_session=False)
+    db.commit()
+    return taken > 0
+
+def claim_idempotency_key(db, user_id, key, endpoint, data):
+    digest = request_hash(data)
+    claimed = db.execute(insert(models.IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        endpoint=endpoint,
+        request_hash=digest
+    ).on_conflict_do_nothing(index_elements=["user_id", "key"]).returning(models.IdempotencyKey.key)).scalar()
+    db.commit()
+    if claimed is not None:
+        return None
+    record = db.query(models.IdempotencyKey).filter_by(user_id=user_id, key=key).first()
+    if record is None:
+        return claim_idempotency_key(db, user_id, key, endpoint, data)
+    if record.endpoint != endpoint or record.request_hash != digest:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    if record.response is None:
+        if take_over_expired_claim(db, user_id, key):
+            return None
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    return record.response
+
+def store_idempotency_response(db, user_id, key, response):
+    db.query(models.IdempotencyKey).filter_by(user_id=user_id, key=key).update(
+        {models.IdempotencyKey.response: response}, synchronize_session=False
+    )
+    db.commit()
+
+def release_idempotency_key(db, user_id, key):
+    db.rollback()
+    db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.user_id == user_id,
+        models.IdempotencyKey.key == key,
+        models.IdempotencyKey.response.is_(None)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+def purge_expired_idempotency_keys(db, ttl_seconds=None):
+    ttl_seconds = ttl_seconds or settings.IDEMPOTENCY_KEY_TTL_SECONDS
+    expired_before = datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)
+    deleted = db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.created_at < expired_before
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,98 @@
+from sqlalchemy import event, inspect, text
+from .. import models
+from app.database import SessionLocal
+
+STALE_KEY = "stale_item_features"
+
+FEATURE_SOURCES = {
+    "word": ("words", "word_component_links", "word_id", "word_meanings", "word_id", None, None),
+    "phrase": ("phrases", "phrase_components", "phrase_id", "phrase_meanings", "phrase_id", None, None),
+    "group": ("semantic_groups", None, None, None, None, "semantic_group_links", "group_id"),
+}
+
+TRACKED_MODELS = {
+    models.Word: ("word", "id"),
+    models.Phrase: ("phrase", "id"),
+    models.SemanticGroup: ("group", "id"),
+    models.WordComponentLink: ("word", "word_id"),
+    models.WordMeaning: ("word", "word_id"),
+    models.PhraseComponent: ("phrase", "phrase_id"),
+    models.PhraseMeaning: ("phrase", "phrase_id"),
+    models.SemanticGroupLink: ("group", "group_id"),
+}
+
+def count_expression(table, column, alias):
+    if table is None:
+        return "0"
+    return f"(SELECT count(*) FROM {table} c WHERE c.{column} = {alias}.id)"
+
+def refresh_statement(item_type):
+    table, components, component_column, meanings, meaning_column, members, member_column = FEATURE_SOURCES[item_type]
+    return text(f"""
+INSERT INTO item_features (item_type, item_id, level, frequency, categories, component_count, meaning_count, member_count, updated_at)
+SELECT :item_type, t.id, t.level, t.frequency, t.categories,
+       {count_expression(components, component_column, "t")},
+       {count_expression(meanings, meaning_column, "t")},
+       {count_expression(members, member_column, "t")},
+       now()
+FROM {table} t
+WHERE t.id = ANY(:ids)
+ON CONFLICT (item_type, item_id) DO UPDATE SET
+    level = EXCLUDED.level,
+    frequency = EXCLUDED.frequency,
+    categories = EXCLUDED.categories,
+    component_count = EXCLUDED.component_count,
+    meaning_count = EXCLUDED.meaning_count,
+    member_count = EXCLUDED.member_count,
+    updated_at = EXCLUDED.updated_at
+""")
+
+def delete_statement(item_type):
+    table = FEATURE_SOURCES[item_type][0]
+    return text(f"""
+DELETE FROM item_features f
+WHERE f.item_type = :item_type AND f.item_id = ANY(:ids)
+AND NOT EXISTS (SELECT 1 FROM {table} t WHERE t.id = f.item_id)
+""")
+
+def refresh_item_features(db, item_type, item_ids):
+    ids = sorted(set(i for i in item_ids if i is not None))
+    if not ids:
+        return
+    params = {"item_type": item_type, "ids": ids}
+    db.execute(refresh_statement(item_type), params)
+    db.execute(delete_statement(item_type), params)
+
+def mark_item_features_stale(db, item_type, item_ids):
+    db.info.setdefault(STALE_KEY, set()).update((item_type, i) for i in item_ids)
+
+def group_ids_for(db, column, item_id):
+    return [row.group_id for row in db.query(models.SemanticGroupLink.group_id).filter(column == item_id).distinct()]
+
+def tracked_keys(obj):
+    item_type, attribute = TRACKED_MODELS[type(obj)]
+    history = inspect(obj).attrs[attribute].history
+    return [(item_type, value) for value in (*history.unchanged, *history.added, *history.deleted) if value is not None]
+
+@event.listens_for(SessionLocal, "after_flush")
+def collect_stale_item_features(session, flush_context):
+    stale = session.info.setdefault(STALE_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if type(obj) in TRACKED_MODELS:
+            stale.update(tracked_keys(obj))
+
+@event.listens_for(SessionLocal, "before_commit")
+def refresh_stale_item_features(session):
+    session.flush()
+    stale = session.info.pop(STALE_KEY, None)
+    if not stale:
+        return
+    by_type = {}
+    for item_type, item_id in stale:
+        by_type.setdefault(item_type, set()).add(item_id)
+    for item_type, item_ids in by_type.items():
+        refresh_item_features(session, item_type, item_ids)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_stale_item_features(session):
+    session.info.pop(STALE_KEY, None)
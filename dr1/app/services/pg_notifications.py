@@ -0,0 +1,79 @@
+import json
+import logging
+import select
+import threading
+import uuid
+import psycopg2
+from sqlalchemy import text
+from app.database import DATABASE_URL
+
+INSTANCE_ID = uuid.uuid4().hex
+RECONNECT_SECONDS = 5
+
+handlers = {}
+connect_handlers = []
+stop_event = threading.Event()
+listener_thread = None
+
+def subscribe(channel, callback):
+    handlers.setdefault(channel, []).append(callback)
+
+def on_connect(callback):
+    connect_handlers.append(callback)
+
+def notify(db, channel, payload):
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {
+        "channel": channel,
+        "payload": json.dumps({**payload, "origin": INSTANCE_ID})
+    })
+
+def dispatch(channel, raw_payload):
+    payload = json.loads(raw_payload)
+    if payload.pop("origin", None) == INSTANCE_ID:
+        return
+    for callback in handlers.get(channel, []):
+        try:
+            callback(payload)
+        except Exception:
+            logging.exception(f"Notification handler failed on channel {channel}")
+
+def listen_loop():
+    while not stop_event.is_set():
+        connection = None
+        try:
+            connection = psycopg2.connect(DATABASE_URL)
+            connection.autocommit = True
+            cursor = connection.cursor()
+            for channel in handlers:
+                cursor.execute(f'LISTEN "{channel}"')
+            for callback in connect_handlers:
+                callback()
+            while not stop_event.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notification = connection.notifies.pop(0)
+                    dispatch(notification.channel, notification.payload)
+        except Exception:
+            logging.exception("Postgres notification listener failed, reconnecting")
+            stop_event.wait(RECONNECT_SECONDS)
+        finally:
+            if connection is not None:
+                connection.close()
+
+def start_listener():
+    global listener_thread
+    if listener_thread is not None or not handlers:
+        return
+    stop_event.clear()
+    listener_thread = threading.Thread(target=listen_loop, name="pg-notifications", daemon=True)
+    listener_thread.start()
+
+def stop_listener():
+    global listener_thread
+    if listener_thread is None:
+        return
+    stop_event.set()
+    listener_thread.join(timeout=5)
+    listener_thread = None
@@ -1,5 +1,31 @@
 from sqlalchemy.orm import Session, joinedload
 from .. import models, schemas
+from app.utils.text_normalization import normalize_answer
+from app.services.accepted_answer_service import rebuild_accepted_answers, delete_accepted_answers
+from app.services.item_features_service import mark_item_features_stale, group_ids_for
+
+def refresh_phrase_canonical_text(phrase_ids, db: Session):
+    phrase_ids = set(phrase_ids)
+    if not phrase_ids:
+        return
+    rows = db.query(models.PhraseComponent.phrase_id, models.Word.text).join(
+        models.Word, models.Word.id == models.PhraseComponent.word_id
+    ).filter(
+        models.PhraseComponent.phrase_id.in_(phrase_ids)
+    ).order_by(models.PhraseComponent.phrase_id, models.PhraseComponent.order).all()
+    texts = {phrase_id: [] for phrase_id in phrase_ids}
+    for phrase_id, text in rows:
+        if text:
+            texts[phrase_id].append(text)
+    for phrase in db.query(models.Phrase).filter(models.Phrase.id.in_(phrase_ids)):
+        canonical_text = " ".join(texts[phrase.id]) or None
+        phrase.canonical_text = canonical_text
+        phrase.canonical_text_normalized = normalize_answer(canonical_text) if canonical_text else None
+    db.flush()
+    rebuild_accepted_answers(db, "phrase", phrase_ids)
+
+def phrase_ids_for_word(word_id: int, db: Session):
+    return [row.phrase_id for row in db.query(models.PhraseComponent.phrase_id).filter(models.PhraseComponent.word_id == word_id).distinct()]
 
 def create_phrase_service(phrase: schemas.PhraseCreate, db: Session):
     db_phrase = models.Phrase()
@@ -10,6 +36,8 @@ def create_phrase_service(phrase: schemas.PhraseCreate, db: Session):
         db_phrase_component = models.PhraseComponent(phrase_id=db_phrase.id, word_id=word_id, order=order)
         db.add(db_phrase_component)
     db.commit()
+    refresh_phrase_canonical_text([db_phrase.id], db)
+    db.commit()
     words = db.query(models.Word).filter(models.Word.id.in_(phrase.words)).all()
     return db_phrase, words
 
@@ -40,12 +68,14 @@ def update_phrase_service(phrase_id: int, phrase_update: schemas.PhraseCreate, d
     if "words" in phrase_update.dict(exclude_unset=True):
         
         db.query(models.PhraseComponent).filter(models.PhraseComponent.phrase_id == phrase_id).delete()
+        mark_item_features_stale(db, "phrase", [phrase_id])
         db.commit()
         
         for order, word_id in enumerate(phrase_update.words):
             db_phrase_component = models.PhraseComponent(phrase_id=phrase.id, word_id=word_id, order=order)
             db.add(db_phrase_component)
         db.commit()
+        refresh_phrase_canonical_text([phrase.id], db)
     db.commit()
     db.refresh(phrase)
     return phrase
@@ -63,7 +93,9 @@ def delete_phrase_service(phrase_id: int, db: Session):
     db.query(models.PhraseMeaning).filter(models.PhraseMeaning.phrase_id == phrase_id).delete()
     db.query(models.PhraseComponent).filter(models.PhraseComponent.phrase_id == phrase_id).delete()
     db.query(models.PhraseLabelLink).filter(models.PhraseLabelLink.phrase_id == phrase_id).delete()
+    mark_item_features_stale(db, "group", group_ids_for(db, models.SemanticGroupLink.phrase_id, phrase_id))
     db.query(models.SemanticGroupLink).filter(models.SemanticGroupLink.phrase_id == phrase_id).delete()
+    delete_accepted_answers(db, "phrase", phrase_id)
     db.delete(phrase)
     db.commit()
     return True
@@ -0,0 +1,91 @@
+import numpy as np
+from datetime import datetime, timezone
+from .. import models
+from app.config import settings
+
+DECAY = -0.5
+FACTOR = 0.9 ** (1 / DECAY) - 1
+SECONDS_PER_DAY = 86400.0
+
+def load_card_arrays(db, user_id=None, due_before=None):
+    query = db.query(
+        models.UserCardReview.user_id,
+        models.UserCardReview.item_type,
+        models.UserCardReview.item_id,
+        models.UserCardReview.stability,
+        models.UserCardReview.difficulty,
+        models.UserCardReview.last_review_at,
+        models.UserCardReview.due_at
+    ).filter(
+        models.UserCardReview.is_review == True,
+        models.UserCardReview.stability.isnot(None)
+    )
+    if user_id is not None:
+        query = query.filter(models.UserCardReview.user_id == user_id)
+    if due_before is not None:
+        query = query.filter(models.UserCardReview.due_at <= due_before)
+    rows = query.all()
+    count = len(rows)
+    return {
+        "user_id": np.fromiter((r.user_id for r in rows), dtype=np.int64, count=count),
+        "item_type": np.array([r.item_type for r in rows], dtype=object),
+        "item_id": np.fromiter((r.item_id for r in rows), dtype=np.int64, count=count),
+        "stability": np.fromiter((r.stability for r in rows), dtype=np.float64, count=count),
+        "difficulty": np.fromiter((r.difficulty if r.difficulty is not None else np.nan for r in rows), dtype=np.float64, count=count),
+        "last_review": np.fromiter((r.last_review_at.timestamp() if r.last_review_at else np.nan for r in rows), dtype=np.float64, count=count),
+        "due": np.fromiter((r.due_at.timestamp() if r.due_at else np.nan for r in rows), dtype=np.float64, count=count),
+    }
+
+def retrievability(stability, elapsed_days):
+    value = np.power(1 + FACTOR * np.maximum(elapsed_days, 0) / stability, DECAY)
+    return np.where(np.isnan(elapsed_days), 0.0, value)
+
+def next_interval(stability, desired_retention=None, maximum_interval=None):
+    desired_retention = desired_retention or settings.FSRS_DESIRED_RETENTION
+    maximum_interval = maximum_interval or settings.FSRS_MAXIMUM_INTERVAL
+    interval = stability / FACTOR * (desired_retention ** (1 / DECAY) - 1)
+    return np.clip(np.round(interval), 1, maximum_interval)
+
+def score_cards(cards, now=None):
+    now = now or datetime.now(timezone.utc)
+    elapsed_days = np.floor((now.timestamp() - cards["last_review"]) / SECONDS_PER_DAY)
+    cards["retrievability"] = retrievability(cards["stability"], elapsed_days)
+    cards["next_interval"] = next_interval(cards["stability"])
+    return cards
+
+def lowest_indices(values, limit):
+    if limit >= len(values):
+        return np.argsort(values, kind="stable")
+    candidates = np.argpartition(values, limit)[:limit]
+    return candidates[np.argsort(values[candidates], kind="stable")]
+
+def weakest_items(db, user_id, limit=50, now=None):
+    cards = score_cards(load_card_arrays(db, user_id), now)
+    return [
+        {
+            "item_type": cards["item_type"][i],
+            "item_id": int(cards["item_id"][i]),
+            "retrievability": float(cards["retrievability"][i]),
+            "stability": float(cards["stability"][i]),
+            "difficulty": None if np.isnan(cards["difficulty"][i]) else float(cards["difficulty"][i]),
+            "due_at": datetime.fromtimestamp(cards["due"][i], timezone.utc) if not np.isnan(cards["due"][i]) else None,
+        }
+        for i in lowest_indices(cards["retrievability"], limit)
+    ]
+
+def expected_retention(db, user_id=None, now=None):
+    cards = score_cards(load_card_arrays(db, user_id), now)
+    total = len(cards["retrievability"])
+    if not total:
+        return {"card_count": 0, "expected_retention": None, "expected_recalled": 0.0, "below_desired_retention": 0}
+    return {
+        "card_count": total,
+        "expected_retention": float(cards["retrievability"].mean()),
+        "expected_recalled": float(cards["retrievability"].sum()),
+        "below_desired_retention": int((cards["retrievability"] < settings.FSRS_DESIRED_RETENTION).sum()),
+    }
+
+def lowest_retrievability_due_items(db, user_id, count, now=None):
+    now = now or datetime.now(timezone.utc)
+    cards = score_cards(load_card_arrays(db, user_id, due_before=now), now)
+    return [(cards["item_type"][i], int(cards["item_id"][i])) for i in lowest_indices(cards["retrievability"], count)]
@@ -0,0 +1,244 @@
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from .. import models
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.services.studyset_service import build_study_set
+
+ACTIVE_STATUSES = ("pending", "running")
+
+executor = None
+executor_lock = threading.Lock()
+in_flight = set()
+stop_event = threading.Event()
+sweeper = None
+
+def init_worker():
+    engine.dispose(close=False)
+
+def claim_job(db, job_id):
+    now = datetime.now(timezone.utc)
+    claimed = db.query(models.StudySetJob).filter(
+        models.StudySetJob.id == job_id,
+        models.StudySetJob.status == "pending"
+    ).update({
+        models.StudySetJob.status: "running",
+        models.StudySetJob.started_at: now,
+        models.StudySetJob.claimed_at: now,
+        models.StudySetJob.heartbeat_at: now
+    }, synchronize_session=False)
+    return now if claimed else None
+
+def holds_lease(db, job_id, claimed_at):
+    return db.query(models.StudySetJob).filter(
+        models.StudySetJob.id == job_id,
+        models.StudySetJob.status == "running",
+        models.StudySetJob.claimed_at == claimed_at
+    )
+
+def refresh_lease(db, job_id, claimed_at):
+    return holds_lease(db, job_id, claimed_at).update({
+        models.StudySetJob.heartbeat_at: datetime.now(timezone.utc)
+    }, synchronize_session=False) > 0
+
+def finish_job(db, job_id, claimed_at, result):
+    return holds_lease(db, job_id, claimed_at).update({
+        **result,
+        models.StudySetJob.finished_at: datetime.now(timezone.utc)
+    }, synchronize_session=False) > 0
+
+def keep_lease(job_id, claimed_at, stop):
+    while not stop.wait(settings.STUDYSET_JOB_HEARTBEAT_SECONDS):
+        db = SessionLocal()
+        try:
+            alive = refresh_lease(db, job_id, claimed_at)
+            db.commit()
+        except Exception:
+            logging.exception(f"Could not refresh the lease of study set job {job_id}")
+            continue
+        finally:
+            db.close()
+        if not alive:
+            return
+
+def run_study_set_job(job_id):
+    db = SessionLocal()
+    try:
+        claimed_at = claim_job(db, job_id)
+        if claimed_at is None:
+            db.rollback()
+            return
+        db.commit()
+        stop = threading.Event()
+        threading.Thread(target=keep_lease, args=(job_id, claimed_at, stop), daemon=True).start()
+        try:
+            job = db.query(models.StudySetJob).filter(models.StudySetJob.id == job_id).first()
+            try:
+                user = db.query(models.User).filter(models.User.id == job.user_id).first()
+                word_ids, phrase_ids, group_ids = build_study_set(
+                    user, db, job.mode, job.params.get("max_per_category"), job.params.get("max_per_semantic_group")
+                )
+                study_set = models.UserStudySet(
+                    user_id=job.user_id,
+                    word_ids=word_ids,
+                    phrase_ids=phrase_ids,
+                    semantic_group_ids=group_ids,
+                    created_at=datetime.utcnow()
+                )
+                db.add(study_set)
+                db.flush()
+                result = {models.StudySetJob.status: "done", models.StudySetJob.study_set_id: study_set.id}
+            except Exception as e:
+                db.rollback()
+                result = {models.StudySetJob.status: "failed", models.StudySetJob.error: getattr(e, "detail", None) or str(e) or type(e).__name__}
+            if finish_job(db, job_id, claimed_at, result):
+                db.commit()
+            else:
+                db.rollback()
+                logging.warning(f"Study set job {job_id} lost its lease, result discarded")
+        finally:
+            stop.set()
+    finally:
+        db.close()
+
+def new_executor():
+    return ProcessPoolExecutor(max_workers=settings.STUDYSET_JOB_WORKERS, initializer=init_worker)
+
+def restart_executor(broken):
+    global executor
+    with executor_lock:
+        if executor is None or executor is not broken:
+            return
+        executor = new_executor()
+    broken.shutdown(wait=False, cancel_futures=True)
+    logging.warning("Study set job pool was broken, started a new one")
+
+def mark_job_failed(job_id, error):
+    db = SessionLocal()
+    try:
+        db.query(models.StudySetJob).filter(
+            models.StudySetJob.id == job_id,
+            models.StudySetJob.status.in_(ACTIVE_STATUSES)
+        ).update({
+            models.StudySetJob.status: "failed",
+            models.StudySetJob.error: error,
+            models.StudySetJob.finished_at: datetime.now(timezone.utc)
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def job_finished(job_id, pool, future):
+    in_flight.discard(job_id)
+    if future.cancelled() or future.exception() is None:
+        return
+    error = future.exception()
+    logging.error(f"Study set job {job_id} crashed", exc_info=error)
+    if isinstance(error, BrokenProcessPool):
+        restart_executor(pool)
+    try:
+        mark_job_failed(job_id, str(error) or type(error).__name__)
+    except Exception:
+        logging.exception(f"Could not mark study set job {job_id} failed")
+
+def dispatch_job(job_id):
+    if job_id in in_flight:
+        return
+    for _ in range(2):
+        pool = executor
+        if pool is None:
+            logging.warning(f"Study set job pool is not running, job {job_id} stays pending")
+            return
+        in_flight.add(job_id)
+        try:
+            future = pool.submit(run_study_set_job, job_id)
+        except BrokenProcessPool:
+            in_flight.discard(job_id)
+            restart_executor(pool)
+            continue
+        except Exception:
+            in_flight.discard(job_id)
+            logging.exception(f"Could not dispatch study set job {job_id}, it stays pending")
+            return
+        future.add_done_callback(lambda f: job_finished(job_id, pool, f))
+        return
+    logging.error(f"Study set job pool keeps breaking, job {job_id} stays pending")
+
+def submit_study_set_job(db, user, requested_by, mode="ga", params=None):
+    job_id = db.execute(insert(models.StudySetJob).values(
+        user_id=user.id,
+        requested_by=requested_by.id,
+        mode=mode,
+        params=params or {}
+    ).on_conflict_do_nothing(
+        index_elements=["user_id"],
+        index_where=text("status IN ('pending', 'running')")
+    ).returning(models.StudySetJob.id)).scalar()
+    db.commit()
+    if job_id is not None:
+        dispatch_job(job_id)
+        return db.query(models.StudySetJob).filter(models.StudySetJob.id == job_id).first(), True
+    job = db.query(models.StudySetJob).filter(
+        models.StudySetJob.user_id == user.id,
+        models.StudySetJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+    if job is None:
+        return submit_study_set_job(db, user, requested_by, mode, params)
+    return job, False
+
+def requeue_jobs():
+    db = SessionLocal()
+    try:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.STUDYSET_JOB_STALE_SECONDS)
+        db.query(models.StudySetJob).filter(
+            models.StudySetJob.status == "running",
+            func.coalesce(models.StudySetJob.heartbeat_at, models.StudySetJob.started_at) < stale_before
+        ).update({
+            models.StudySetJob.status: "pending",
+            models.StudySetJob.claimed_at: None,
+            models.StudySetJob.heartbeat_at: None
+        }, synchronize_session=False)
+        db.commit()
+        return [row.id for row in db.query(models.StudySetJob.id).filter(
+            models.StudySetJob.status == "pending"
+        ).order_by(models.StudySetJob.id)]
+    finally:
+        db.close()
+
+def sweep_jobs():
+    while not stop_event.wait(settings.STUDYSET_JOB_SWEEP_SECONDS):
+        try:
+            for job_id in requeue_jobs():
+                dispatch_job(job_id)
+        except Exception:
+            logging.exception("Study set job sweep failed")
+
+def start_study_set_workers():
+    global executor, sweeper
+    if executor is not None:
+        return
+    executor = new_executor()
+    job_ids = requeue_jobs()
+    for job_id in job_ids:
+        dispatch_job(job_id)
+    stop_event.clear()
+    sweeper = threading.Thread(target=sweep_jobs, name="studyset-job-sweeper", daemon=True)
+    sweeper.start()
+    logging.info(f"Started study set job pool with {settings.STUDYSET_JOB_WORKERS} workers, {len(job_ids)} pending jobs requeued")
+
+def stop_study_set_workers():
+    global executor, sweeper
+    if executor is None:
+        return
+    stop_event.set()
+    sweeper.join(timeout=5)
+    sweeper = None
+    with executor_lock:
+        pool, executor = executor, None
+    pool.shutdown(wait=False, cancel_futures=True)
+    in_flight.clear()
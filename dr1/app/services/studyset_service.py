@@ -1,84 +1,247 @@
-def evaluate_item(item, user_profile, type_):
-    score = 0
-    if hasattr(item, 'categories') and user_profile.categories and item.categories:
-        if set(user_profile.categories) & set(item.categories):
-            score -= 2
-    if hasattr(item, 'level') and user_profile.current_level and item.level:
-        if item.level > user_profile.current_level:
-            score += 2
-        elif item.level == user_profile.current_level:
-            score += 1
-    if hasattr(item, 'frequency') and item.frequency:
-        score += max(0, 10 - item.frequency)
-    if type_ == 'word':
-        score += getattr(item, 'component_count', 0) + getattr(item, 'value_count', 0)
-    elif type_ == 'phrase':
-        score += getattr(item, 'word_count', 0) + getattr(item, 'value_count', 0)
-    elif type_ == 'group':
-        score += getattr(item, 'member_count', 0)
-    return score
-
-def genetic_algorithm(user, db, population_size=30, generations=10, set_size=20):
-    from app import models
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import text
+from .. import models
+from app.config import settings
+from app.services.retrievability_service import lowest_indices
+
+MUTATION_RATE = 0.2
+MAX_REPAIR_ROUNDS = 8
+ITEM_TYPES = ["word", "phrase", "group"]
+
+LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+
+CANDIDATE_COLUMNS = """
+SELECT f.item_type, f.item_id AS id, f.categories, f.level, f.frequency,
+       f.component_count + f.meaning_count + f.member_count AS size
+FROM item_features f {sample}
+WHERE f.item_type = '{item_type}'
+AND NOT EXISTS (
+    SELECT 1 FROM user_card_reviews r
+    WHERE r.user_id = :user_id AND r.is_review AND r.item_type = f.item_type AND r.item_id = f.item_id
+)
+"""
+
+def level_window(user_profile):
+    if user_profile.current_level not in LEVELS:
+        return None
+    current = LEVELS.index(user_profile.current_level)
+    low = max(0, current - settings.STUDYSET_LEVEL_WINDOW)
+    high = min(len(LEVELS) - 1, current + settings.STUDYSET_LEVEL_WINDOW)
+    if user_profile.desired_level in LEVELS:
+        high = max(high, LEVELS.index(user_profile.desired_level))
+    return LEVELS[low:high + 1]
+
+def candidate_statement(levels, categories, pool_size, sample_percent, seeded=False):
+    parts = []
+    sample = ""
+    if sample_percent:
+        sample = "TABLESAMPLE SYSTEM (:sample_percent)" + (" REPEATABLE (:seed)" if seeded else "")
+    for item_type in ITEM_TYPES:
+        sql = CANDIDATE_COLUMNS.format(item_type=item_type, sample=sample)
+        if levels:
+            sql += "AND (f.level IS NULL OR f.level = ANY(:levels))\n"
+        if categories:
+            sql += "AND f.categories && CAST(:categories AS INTEGER[])\n"
+        if pool_size:
+            order = "md5(CAST(f.item_id AS TEXT) || CAST(:seed AS TEXT))" if seeded else "random()"
+            sql += f"ORDER BY {order} LIMIT :pool_size\n"
+        parts.append(f"({sql})")
+    return text(" UNION ALL ".join(parts))
+
+def sample_percent(db):
+    if settings.STUDYSET_SAMPLE_PERCENT:
+        return settings.STUDYSET_SAMPLE_PERCENT
+    if not settings.STUDYSET_SAMPLE_ROWS:
+        return None
+    rows = db.execute(text("SELECT reltuples FROM pg_class WHERE oid = 'item_features'::regclass")).scalar() or 0
+    if rows <= settings.STUDYSET_SAMPLE_ROWS:
+        return None
+    return 100.0 * settings.STUDYSET_SAMPLE_ROWS / rows
+
+def item_scores(rows, sizes, user_profile):
+    count = len(rows)
+    scores = np.zeros(count, dtype=np.float64)
+    if not count:
+        return scores
+    user_categories = set(user_profile.categories or [])
+    if user_categories:
+        overlaps = np.fromiter(
+            (bool(r.categories and user_categories.intersection(r.categories)) for r in rows),
+            dtype=bool, count=count
+        )
+        scores -= 2 * overlaps
+    if user_profile.current_level:
+        levels = np.array([r.level or "" for r in rows], dtype=object)
+        scores += np.where(levels > user_profile.current_level, 2, np.where(levels == user_profile.current_level, 1, 0))
+    frequency = np.fromiter((r.frequency or 0.0 for r in rows), dtype=np.float64, count=count)
+    scores += np.where(frequency != 0, np.maximum(0, 10 - frequency), 0)
+    return scores + sizes
+
+def pool_arrays(rows):
+    ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=len(rows))
+    sizes = np.fromiter((r.size for r in rows), dtype=np.float64, count=len(rows))
+    return ids, rows, sizes
+
+def repair_duplicates(population, pool_size, rng):
+    for _ in range(MAX_REPAIR_ROUNDS):
+        order = np.argsort(population, axis=1, kind="stable")
+        ordered = np.take_along_axis(population, order, axis=1)
+        repeated = np.zeros(ordered.shape, dtype=bool)
+        repeated[:, 1:] = ordered[:, 1:] == ordered[:, :-1]
+        if not repeated.any():
+            return population
+        duplicates = np.zeros(ordered.shape, dtype=bool)
+        np.put_along_axis(duplicates, order, repeated, axis=1)
+        population[duplicates] = rng.integers(0, pool_size, int(duplicates.sum()))
+    for row in population:
+        values, first = np.unique(row, return_index=True)
+        if len(values) == len(row):
+            continue
+        slots = np.setdiff1d(np.arange(len(row)), first)
+        row[slots] = rng.choice(np.setdiff1d(np.arange(pool_size), values), len(slots), replace=False)
+    return population
+
+def initial_population(population_size, set_size, pool_size, rng):
+    if pool_size <= 4 * set_size:
+        return np.argsort(rng.random((population_size, pool_size)), axis=1)[:, :set_size]
+    return repair_duplicates(rng.integers(0, pool_size, (population_size, set_size)), pool_size, rng)
+
+def crossover(population, parents1, parents2, pool_size, rng):
+    population_size, set_size = len(parents1), population.shape[1]
+    cuts = rng.integers(1, set_size, population_size) if set_size > 1 else np.ones(population_size, dtype=np.int64)
+    children = np.where(np.arange(set_size) < cuts[:, None], population[parents1], population[parents2])
+    mutated = np.flatnonzero(rng.random(population_size) < MUTATION_RATE)
+    children[mutated, rng.integers(0, set_size, len(mutated))] = rng.integers(0, pool_size, len(mutated))
+    return repair_duplicates(children, pool_size, rng)
+
+def evolve(pools, set_sizes, population_size, generations, rng):
+    sizes = [min(n, len(scores)) for scores, n in zip(pools, set_sizes)]
+    populations = [initial_population(population_size, n, len(scores), rng) for scores, n in zip(pools, sizes)]
+    if not any(sizes):
+        return [population[0] if len(population) else np.zeros(0, dtype=np.int64) for population in populations]
+
+    def fitness():
+        return sum(scores[population].sum(axis=1) for scores, population in zip(pools, populations) if population.shape[1])
+
+    survivors_count = max(1, population_size // 2)
+    for _ in range(generations):
+        survivors = np.argsort(fitness(), kind="stable")[:survivors_count]
+        parents1 = rng.choice(survivors, population_size)
+        parents2 = rng.choice(survivors, population_size)
+        populations = [
+            crossover(population, parents1, parents2, len(scores), rng) if population.shape[1] else population
+            for scores, population in zip(pools, populations)
+        ]
+    best = int(np.argmin(fitness()))
+    return [population[best] for population in populations]
+
+def within_limits(keys, counts, limits):
+    return all(counts.get(key, 0) < limits[key[0]] for key in keys if limits.get(key[0]) is not None)
+
+def exact_selection(scores, set_size, labels=None, limits=None):
+    set_size = min(set_size, len(scores))
+    if not limits or not any(limit is not None for limit in limits.values()):
+        return lowest_indices(scores, set_size)
+    window = min(len(scores), 4 * set_size)
+    while True:
+        chosen = []
+        counts = {}
+        for index in lowest_indices(scores, window):
+            keys = labels[index]
+            if not within_limits(keys, counts, limits):
+                continue
+            chosen.append(index)
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+            if len(chosen) == set_size:
+                break
+        if len(chosen) == set_size or window == len(scores):
+            return np.array(chosen, dtype=np.int64)
+        window = min(len(scores), 4 * window)
+
+def group_memberships(db, column):
+    memberships = {}
+    for item_id, group_id in db.query(column, models.SemanticGroupLink.group_id).filter(column.isnot(None)):
+        memberships.setdefault(item_id, []).append(group_id)
+    return memberships
+
+def item_labels(rows, memberships):
+    return [
+        [("category", c) for c in set(r.categories or [])] + [("group", g) for g in set(memberships.get(r.id, []))]
+        for r in rows
+    ]
+
+def load_candidates(db, user_id, levels=None, categories=None, pool_size=None, percent=None, seed=None):
+    params = {"user_id": user_id}
+    if levels:
+        params["levels"] = levels
+    if categories:
+        params["categories"] = categories
+    if pool_size:
+        params["pool_size"] = pool_size
+    if percent:
+        params["sample_percent"] = percent
+    if seed is not None:
+        params["seed"] = seed
+    statement = candidate_statement(levels, categories, pool_size, percent, seed is not None)
+    rows = {item_type: [] for item_type in ITEM_TYPES}
+    for row in db.execute(statement, params):
+        rows[row.item_type].append(row)
+    return rows
+
+def load_study_set_pools(user, db, set_size=20, prefilter=True, seed=None):
     user_profile = user.profile
     if user_profile is None:
-        from fastapi import HTTPException
         raise HTTPException(status_code=400, detail="User profile is not set. Please fill in your profile before generating a study set.")
-    active_reviews = db.query(models.UserCardReview).filter_by(user_id=user.id, is_review=True).all()
-    reviewed_word_ids = set(r.item_id for r in active_reviews if r.item_type == 'word')
-    reviewed_phrase_ids = set(r.item_id for r in active_reviews if r.item_type == 'phrase')
-    reviewed_group_ids = set(r.item_id for r in active_reviews if r.item_type == 'group')
-    words = {w.id: w for w in db.query(models.Word).filter(~models.Word.id.in_(reviewed_word_ids)).all()}
-    phrases = {p.id: p for p in db.query(models.Phrase).filter(~models.Phrase.id.in_(reviewed_phrase_ids)).all()}
-    groups = {g.id: g for g in db.query(models.SemanticGroup).filter(~models.SemanticGroup.id.in_(reviewed_group_ids)).all()}
+    if not prefilter:
+        rows = load_candidates(db, user.id)
+        return [pool_arrays(sorted(rows[item_type], key=lambda r: r.id)) for item_type in ITEM_TYPES]
+    levels = level_window(user_profile)
+    categories = list(user_profile.categories or []) or None
+    percent = sample_percent(db)
+    rows = load_candidates(db, user.id, levels, categories, settings.STUDYSET_POOL_SIZE, percent, seed)
+    if (levels or categories or percent) and any(len(rows[t]) < n for t, n in zip(ITEM_TYPES, set_sizes(set_size))):
+        rows = load_candidates(db, user.id, pool_size=settings.STUDYSET_POOL_SIZE, seed=seed)
+    return [pool_arrays(sorted(rows[item_type], key=lambda r: r.id)) for item_type in ITEM_TYPES]
+
+def set_sizes(set_size):
     n_words = int(set_size * 0.4)
     n_phrases = int(set_size * 0.4)
-    n_groups = set_size - n_words - n_phrases
-    import random
-    population = []
-    for _ in range(population_size):
-        word_ids = random.sample(list(words.keys()), min(n_words, len(words)))
-        phrase_ids = random.sample(list(phrases.keys()), min(n_phrases, len(phrases)))
-        group_ids = random.sample(list(groups.keys()), min(n_groups, len(groups)))
-        population.append((word_ids, phrase_ids, group_ids))
-    for _ in range(generations):
-        scored = []
-        for word_ids, phrase_ids, group_ids in population:
-            score = sum(evaluate_item(words[wid], user_profile, 'word') for wid in word_ids)
-            score += sum(evaluate_item(phrases[pid], user_profile, 'phrase') for pid in phrase_ids)
-            score += sum(evaluate_item(groups[gid], user_profile, 'group') for gid in group_ids)
-            scored.append((score, word_ids, phrase_ids, group_ids))
-        scored.sort(key=lambda x: x[0])
-        survivors = scored[:population_size//2]
-        new_population = []
-        for _ in range(population_size):
-            parent1 = random.choice(survivors)
-            parent2 = random.choice(survivors)
-            def crossover(a, b, n, pool):
-                cut = random.randint(1, n-1) if n > 1 else 1
-                child = list(set(a[:cut] + b[cut:]))
-                if random.random() < 0.2:
-                    if random.random() < 0.5 and len(child) > 1:
-                        child.pop(random.randint(0, len(child)-1))
-                    else:
-                        available = set(pool) - set(child)
-                        if available:
-                            child.append(random.choice(list(available)))
-                while len(child) > n:
-                    child.pop(random.randint(0, len(child)-1))
-                available = set(pool) - set(child)
-                while len(child) < n and available:
-                    child.append(random.choice(list(available)))
-                    available = set(pool) - set(child)
-                return list(set(child))
-            child_word_ids = crossover(parent1[1], parent2[1], n_words, words.keys())
-            child_phrase_ids = crossover(parent1[2], parent2[2], n_phrases, phrases.keys())
-            child_group_ids = crossover(parent1[3], parent2[3], n_groups, groups.keys())
-            new_population.append((child_word_ids, child_phrase_ids, child_group_ids))
-        population = new_population
-    best = min(population, key=lambda ids: (
-        sum(evaluate_item(words[wid], user_profile, 'word') for wid in ids[0]) +
-        sum(evaluate_item(phrases[pid], user_profile, 'phrase') for pid in ids[1]) +
-        sum(evaluate_item(groups[gid], user_profile, 'group') for gid in ids[2])
-    ))
-    return best[0], best[1], best[2] 
\ No newline at end of file
+    return [n_words, n_phrases, set_size - n_words - n_phrases]
+
+def genetic_algorithm(user, db, population_size=30, generations=10, set_size=20, seed=None):
+    pools = load_study_set_pools(user, db, set_size, seed=seed)
+    rng = np.random.default_rng(seed)
+    best = evolve(
+        [item_scores(rows, sizes, user.profile) for _, rows, sizes in pools],
+        set_sizes(set_size),
+        population_size,
+        generations,
+        rng
+    )
+    return tuple([int(i) for i in ids[indices]] for (ids, _, _), indices in zip(pools, best))
+
+def exact_study_set(user, db, set_size=20, max_per_category=None, max_per_semantic_group=None):
+    pools = load_study_set_pools(user, db, set_size, prefilter=False)
+    limits = {"category": max_per_category, "group": max_per_semantic_group}
+    memberships = [
+        group_memberships(db, models.SemanticGroupLink.word_id) if max_per_semantic_group is not None else {},
+        group_memberships(db, models.SemanticGroupLink.phrase_id) if max_per_semantic_group is not None else {},
+        {},
+    ]
+    best = [
+        exact_selection(
+            item_scores(rows, sizes, user.profile),
+            n,
+            item_labels(rows, item_memberships),
+            limits
+        )
+        for (_, rows, sizes), n, item_memberships in zip(pools, set_sizes(set_size), memberships)
+    ]
+    return tuple([int(i) for i in ids[indices]] for (ids, _, _), indices in zip(pools, best))
+
+def build_study_set(user, db, mode="ga", max_per_category=None, max_per_semantic_group=None):
+    if mode == "exact":
+        return exact_study_set(user, db, max_per_category=max_per_category, max_per_semantic_group=max_per_semantic_group)
+    return genetic_algorithm(user, db)
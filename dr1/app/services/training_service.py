@@ -1,196 +1,363 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, selectinload
 from .. import models, schemas
 from datetime import datetime, timezone
-from fsrs import Scheduler, Card, Rating, ReviewLog
-import json
-from app.utils.gemini import analyze_error_with_gemini
+from functools import lru_cache
+from fsrs import Scheduler, Card, Rating
+from app.services.error_analysis_service import enqueue_error_analysis
+from app.services.analysis_cache_service import get_cached_analysis
+from app.services.accepted_answer_service import GENDER_ARTICLES, is_accepted_answer
+from app.config import settings
+from starlette.concurrency import run_in_threadpool
+from app.services.retrievability_service import lowest_retrievability_due_items
+from app.services.due_queue import due_queues, card_updates, publish_due_updates
+from app.utils.text_normalization import normalize_answer, strip_umlauts, fold_answer, edit_distance
 
-def start_training_service(count, is_review, db, current_user):
+MAX_TRAINING_COUNT = 100
+
+def meanings_to_dict(meanings):
+    return [
+        {
+            "meaning": m.meaning,
+            "examples": [
+                {"example_text": ex.example_text} for ex in m.examples
+            ]
+        }
+        for m in meanings
+    ]
+
+def build_questions(items, db):
+    word_ids = [item_id for item_type, item_id in items if item_type == "word"]
+    phrase_ids = [item_id for item_type, item_id in items if item_type == "phrase"]
+    words = {}
+    if word_ids:
+        words = {w.id: w for w in db.query(models.Word).options(
+            selectinload(models.Word.meanings).selectinload(models.WordMeaning.examples),
+            selectinload(models.Word.part_of_speech_obj)
+        ).filter(models.Word.id.in_(word_ids))}
+    phrases = {}
+    if phrase_ids:
+        phrases = {p.id: p for p in db.query(models.Phrase).options(
+            selectinload(models.Phrase.meanings).selectinload(models.PhraseMeaning.examples)
+        ).filter(models.Phrase.id.in_(phrase_ids))}
+    questions = []
+    for item_type, item_id in items:
+        if item_type == "word":
+            word = words.get(item_id)
+            if word is None or not word.meanings:
+                continue
+            questions.append({
+                "item_type": "word",
+                "item_id": item_id,
+                "meanings": meanings_to_dict(word.meanings),
+                "part_of_speech": word.part_of_speech,
+                "part_of_speech_obj": {"id": word.part_of_speech_obj.id, "name": word.part_of_speech_obj.name} if word.part_of_speech_obj else None,
+            })
+        elif item_type == "phrase":
+            phrase = phrases.get(item_id)
+            if phrase is None or not phrase.meanings:
+                continue
+            questions.append({
+                "item_type": "phrase",
+                "item_id": item_id,
+                "meanings": meanings_to_dict(phrase.meanings)
+            })
+    return questions
+
+UNSEEN_STUDY_SET_ITEMS = text("""
+WITH study_set AS (
+    SELECT id, word_ids, phrase_ids FROM user_study_sets
+    WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 1
+), items AS (
+    SELECT 'word' AS item_type, w.item_id, 0 AS type_order, w.ord
+    FROM study_set CROSS JOIN LATERAL unnest(study_set.word_ids) WITH ORDINALITY AS w(item_id, ord)
+    UNION ALL
+    SELECT 'phrase' AS item_type, p.item_id, 1 AS type_order, p.ord
+    FROM study_set CROSS JOIN LATERAL unnest(study_set.phrase_ids) WITH ORDINALITY AS p(item_id, ord)
+)
+SELECT items.item_type, items.item_id FROM items
+WHERE NOT EXISTS (
+    SELECT 1 FROM user_card_reviews r
+    WHERE r.user_id = :user_id AND r.item_type = items.item_type AND r.item_id = items.item_id
+)
+AND CASE items.item_type
+    WHEN 'word' THEN EXISTS (SELECT 1 FROM word_meanings m WHERE m.word_id = items.item_id)
+    ELSE EXISTS (SELECT 1 FROM phrase_meanings m WHERE m.phrase_id = items.item_id)
+END
+ORDER BY items.type_order, items.ord
+LIMIT :count
+""")
+
+def start_training_service(count, is_review, db, current_user, order="due"):
+    if is_review and order == "retrievability":
+        items = lowest_retrievability_due_items(db, current_user.id, count)
+        return {"questions": build_questions(items, db)}
     if is_review:
-        reviews = db.query(models.UserCardReview).filter_by(user_id=current_user.id, is_review=True).all()
-        due_cards = []
-        for r in reviews:
-            card = Card.from_dict(json.loads(r.card_json))
-            if card.due <= datetime.now(timezone.utc):
-                due_cards.append(r)
-        selected = due_cards[:count]
-        questions = []
-        for r in selected:
-            if r.item_type == "word":
-                word = db.query(models.Word).get(r.item_id)
-                if word is None:
-                    continue
-                meanings = []
-                for m in word.meanings:
-                    meanings.append({
-                        "meaning": m.meaning,
-                        "examples": [
-                            {"example_text": ex.example_text} for ex in m.examples
-                        ]
-                    })
-                if not meanings:
-                    continue
-                questions.append({
-                    "item_type": "word",
-                    "item_id": r.item_id,
-                    "meanings": meanings,
-                    "part_of_speech": word.part_of_speech,
-                    "part_of_speech_obj": {"id": word.part_of_speech_obj.id, "name": word.part_of_speech_obj.name} if word.part_of_speech_obj else None,
-                })
-            elif r.item_type == "phrase":
-                phrase = db.query(models.Phrase).get(r.item_id)
-                if phrase is None:
-                    continue
-                meanings = []
-                for m in phrase.meanings:
-                    meanings.append({
-                        "meaning": m.meaning,
-                        "examples": [
-                            {"example_text": ex.example_text} for ex in m.examples
-                        ]
-                    })
-                if not meanings:
-                    continue
-                questions.append({
-                    "item_type": "phrase",
-                    "item_id": r.item_id,
-                    "meanings": meanings
-                })
-        return {"questions": questions}
+        items = due_queues.get_due_items(db, current_user.id, count, datetime.now(timezone.utc))
+        return {"questions": build_questions(items, db)}
     else:
-        study_set = db.query(models.UserStudySet).filter(models.UserStudySet.user_id == current_user.id).order_by(models.UserStudySet.created_at.desc()).first()
-        if not study_set:
-            return {"questions": []}
-        reviewed_ids = set((r.item_type, r.item_id) for r in db.query(models.UserCardReview).filter_by(user_id=current_user.id, is_review=False))
-        questions = []
-        for wid in study_set.word_ids:
-            if ("word", wid) not in reviewed_ids:
-                word = db.query(models.Word).get(wid)
-                if word is None:
-                    continue
-                meanings = []
-                for m in word.meanings:
-                    meanings.append({
-                        "meaning": m.meaning,
-                        "examples": [
-                            {"example_text": ex.example_text} for ex in m.examples
-                        ]
-                    })
-                if not meanings:
-                    continue
-                questions.append({
-                    "item_type": "word",
-                    "item_id": wid,
-                    "meanings": meanings,
-                    "part_of_speech": word.part_of_speech,
-                    "part_of_speech_obj": {"id": word.part_of_speech_obj.id, "name": word.part_of_speech_obj.name} if word.part_of_speech_obj else None,
-                })
-                if len(questions) >= count:
-                    break
-        for pid in study_set.phrase_ids:
-            if ("phrase", pid) not in reviewed_ids:
-                phrase = db.query(models.Phrase).get(pid)
-                if phrase is None:
-                    continue
-                meanings = []
-                for m in phrase.meanings:
-                    meanings.append({
-                        "meaning": m.meaning,
-                        "examples": [
-                            {"example_text": ex.example_text} for ex in m.examples
-                        ]
-                    })
-                if not meanings:
-                    continue
-                questions.append({
-                    "item_type": "phrase",
-                    "item_id": pid,
-                    "meanings": meanings
-                })
-                if len(questions) >= count:
-                    break
-        return {"questions": questions}
+        rows = db.execute(UNSEEN_STUDY_SET_ITEMS, {"user_id": current_user.id, "count": count}).all()
+        return {"questions": build_questions([(r.item_type, r.item_id) for r in rows], db)}
 
-async def submit_answer_service(data, db, current_user):
+ARTICLES = {"der", "die", "das"}
+UMLAUT_CHARACTERS = set("äöüß")
+SHORT_WORD_LENGTH = 4
+TYPO_RATE = 1 / 6
+WORD_FORMS = [
+    ("plural_form", "форму множини"),
+    ("verb_form2", "форму Präteritum"),
+    ("verb_form3", "форму Partizip II"),
+]
+
+def is_subsequence(tokens, sequence):
+    it = iter(sequence)
+    return all(token in it for token in tokens)
+
+def diagnose_answer_locally(item, item_type, correct_answer, user_answer):
+    correct = normalize_answer(correct_answer)
+    answer = normalize_answer(user_answer)
+    if not answer:
+        return {
+            "error_analysis": "Partial Answer",
+            "brief_explanation": f"Відповідь порожня, правильна відповідь — «{correct_answer}»."
+        }
+    if answer == correct:
+        return None
+    umlauts_differ = bool(UMLAUT_CHARACTERS & (set(answer) ^ set(correct)))
+    transliterated = fold_answer(answer) == fold_answer(correct)
+    if umlauts_differ and (transliterated or strip_umlauts(answer) == strip_umlauts(correct)):
+        if "ß" in correct and "ß" not in answer:
+            explanation = f"У слові «{correct_answer}» пишеться ß, а не ss."
+        elif "ß" in answer and "ß" not in correct:
+            explanation = f"У слові «{correct_answer}» пишеться ss, а не ß."
+        elif transliterated and strip_umlauts(answer) != strip_umlauts(correct):
+            explanation = f"Умлаут записано як ae/oe/ue: правильно «{correct_answer}»."
+        else:
+            explanation = f"Пропущено або неправильно поставлено умлаут: правильно «{correct_answer}»."
+        return {"error_analysis": "Spelling Error", "brief_explanation": explanation}
+    if answer.replace(" ", "") == correct.replace(" ", ""):
+        return {
+            "error_analysis": "Spelling Error",
+            "brief_explanation": f"Неправильно поставлено пробіли: правильно «{correct_answer}»."
+        }
+    if item_type == "word":
+        article, _, rest = answer.partition(" ")
+        expected_article = GENDER_ARTICLES.get(normalize_answer(item.gender))
+        if article in ARTICLES and rest == correct and expected_article and article != expected_article:
+            return {
+                "error_analysis": "Grammar Error",
+                "brief_explanation": f"Неправильний артикль: іменник «{correct_answer}» вживається з артиклем «{expected_article}», а не «{article}»."
+            }
+        bare_answer = rest if article in ARTICLES and rest else answer
+        for field, label in WORD_FORMS:
+            form = getattr(item, field)
+            if form and bare_answer == normalize_answer(form) and bare_answer != correct:
+                return {
+                    "error_analysis": "Grammar Error",
+                    "brief_explanation": f"Ви написали {label} «{form}», а потрібна початкова форма «{correct_answer}»."
+                }
+    max_typos = int(len(correct) * TYPO_RATE) if len(correct) > SHORT_WORD_LENGTH else 0
+    if max_typos and edit_distance(answer, correct) <= max_typos:
+        return {
+            "error_analysis": "Spelling Error",
+            "brief_explanation": f"Орфографічна помилка: правильно пишеться «{correct_answer}»."
+        }
+    if item_type == "phrase":
+        correct_tokens = correct.split(" ")
+        answer_tokens = answer.split(" ")
+        if len(answer_tokens) < len(correct_tokens) and is_subsequence(answer_tokens, correct_tokens):
+            missing = [t for t in correct_tokens if t not in answer_tokens]
+            return {
+                "error_analysis": "Partial Answer",
+                "brief_explanation": f"Відповідь неповна: пропущено «{' '.join(missing)}», правильно «{correct_answer}»."
+            }
+    return None
+
+def record_answer(data, db, current_user):
     if data.item_type == "word":
         item = db.query(models.Word).filter(models.Word.id == data.item_id).first()
         if not item:
             return None
         correct_answer = item.text
+        correct_normalized = normalize_answer(item.text)
     else:
         item = db.query(models.Phrase).filter(models.Phrase.id == data.item_id).first()
         if not item:
             return None
-        words = [db.query(models.Word).get(pc.word_id) for pc in sorted(item.components, key=lambda c: c.order)]
-        correct_answer = " ".join([w.text for w in words if w and w.text])
+        correct_answer = item.canonical_text
+        correct_normalized = item.canonical_text_normalized
     if not correct_answer:
         return None
-    is_correct = data.answer.lower().strip() == correct_answer.lower().strip()
-    error_analysis = None
-    brief_explanation = None
+    is_correct = normalize_answer(data.answer) == correct_normalized or is_accepted_answer(db, data.item_type, data.item_id, data.answer)
+    error_record = None
+    analysis = None
     if not is_correct:
-        try:
-            analysis = await analyze_error_with_gemini(correct_answer, data.answer)
-            error_analysis = analysis["error_analysis"]
-            brief_explanation = analysis["brief_explanation"]
-            error_record = models.UserAnswerError(
-                user_id=current_user.id,
-                item_type=data.item_type,
-                item_id=data.item_id,
-                correct_answer=correct_answer,
-                user_answer=data.answer,
-                error_analysis=error_analysis,
-                brief_explanation=brief_explanation
-            )
-            db.add(error_record)
-            db.commit()
-        except Exception:
-            pass
-    attempt = models.UserCardReview(
+        analysis = diagnose_answer_locally(item, data.item_type, correct_answer, data.answer)
+        if analysis is None:
+            analysis = get_cached_analysis(db, correct_answer, data.answer)
+        error_record = models.UserAnswerError(
+            user_id=current_user.id,
+            item_type=data.item_type,
+            item_id=data.item_id,
+            correct_answer=correct_answer,
+            user_answer=data.answer,
+            error_analysis=analysis["error_analysis"] if analysis else None,
+            brief_explanation=analysis["brief_explanation"] if analysis else None,
+            analysis_status="done" if analysis else "pending"
+        )
+        db.add(error_record)
+    now = datetime.utcnow()
+    db.execute(insert(models.UserCardReview).values(
         user_id=current_user.id,
         item_type=data.item_type,
         item_id=data.item_id,
         last_answer=data.answer,
         last_result=is_correct,
         is_review=False,
-        card_json="{}",
-        review_logs_json="[]"
-    )
-    db.add(attempt)
+        card_json={},
+        created_at=now,
+        updated_at=now
+    ).on_conflict_do_update(
+        constraint="uq_user_card_reviews_user_item",
+        set_={"last_answer": data.answer, "last_result": is_correct, "updated_at": now}
+    ))
+    db.add(models.UserAnswerAttempt(
+        user_id=current_user.id,
+        item_type=data.item_type,
+        item_id=data.item_id,
+        answer=data.answer,
+        is_correct=is_correct,
+        created_at=now
+    ))
     db.commit()
     return {
         "is_correct": is_correct,
         "correct_answer": correct_answer,
-        "error_analysis": error_analysis,
-        "brief_explanation": brief_explanation
+        "error_analysis": analysis["error_analysis"] if analysis else None,
+        "brief_explanation": analysis["brief_explanation"] if analysis else None,
+        "error_id": error_record.id if error_record is not None else None,
+        "analysis_status": error_record.analysis_status if error_record is not None else None
     }
 
+async def submit_answer_service(data, db, current_user):
+    result = await run_in_threadpool(record_answer, data, db, current_user)
+    if result is not None and result["analysis_status"] == "pending":
+        enqueue_error_analysis(result["error_id"])
+    return result
+
+def sync_card_columns(review, card):
+    review.due_at = card.due
+    review.state = int(card.state)
+    review.stability = card.stability
+    review.difficulty = card.difficulty
+    review.last_review_at = card.last_review
+
+@lru_cache(maxsize=4096)
+def get_scheduler(parameters=None):
+    if parameters is None:
+        return Scheduler(
+            desired_retention=settings.FSRS_DESIRED_RETENTION,
+            maximum_interval=settings.FSRS_MAXIMUM_INTERVAL
+        )
+    return Scheduler(
+        parameters=parameters,
+        desired_retention=settings.FSRS_DESIRED_RETENTION,
+        maximum_interval=settings.FSRS_MAXIMUM_INTERVAL
+    )
+
+def user_scheduler(db, user_id):
+    parameters = db.query(models.Profile.fsrs_parameters).filter(models.Profile.user_id == user_id).scalar()
+    return get_scheduler(tuple(parameters) if parameters else None)
+
+def to_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def apply_rating(review, rating, db, reviewed_at=None, scheduler=None):
+    scheduler = scheduler or get_scheduler()
+    card = Card.from_dict(review.card_json) if review.card_json else Card()
+    card, review_log = scheduler.review_card(card, Rating(rating), review_datetime=reviewed_at)
+    review.card_json = card.to_dict()
+    sync_card_columns(review, card)
+    db.add(models.UserReviewLog(
+        user_id=review.user_id,
+        item_type=review.item_type,
+        item_id=review.item_id,
+        rating=int(review_log.rating),
+        review_datetime=review_log.review_datetime,
+        review_duration=review_log.review_duration
+    ))
+    review.last_rating = rating
+    review.last_result = (rating >= 3)
+    if not review.is_review and review.last_result:
+        review.is_review = True
+
 def rate_answer_service(data, db, current_user):
     if data.rating not in [1, 2, 3, 4]:
         return None
-    scheduler = Scheduler()
     review = db.query(models.UserCardReview).filter_by(
         user_id=current_user.id,
         item_type=data.item_type,
-        item_id=data.item_id,
-        is_review=False
+        item_id=data.item_id
     ).first()
     if not review:
         return None
-    if review.card_json and review.card_json != "{}":
-        card = Card.from_dict(json.loads(review.card_json))
-        review_logs = [ReviewLog.from_dict(log) for log in json.loads(review.review_logs_json)]
-    else:
-        card = Card()
-        review_logs = []
-    card, review_log = scheduler.review_card(card, Rating(data.rating))
-    review_logs.append(review_log)
-    review.card_json = json.dumps(card.to_dict())
-    review.review_logs_json = json.dumps([log.to_dict() for log in review_logs])
-    review.last_rating = data.rating
-    review.last_result = (data.rating >= 3)
+    apply_rating(review, data.rating, db, scheduler=user_scheduler(db, current_user.id))
+    cards = card_updates([review])
+    publish_due_updates(db, current_user.id, cards)
     db.commit()
-    if not review.is_review and review.last_result:
-        review.is_review = True
-        db.commit()
-    return review 
\ No newline at end of file
+    due_queues.apply_updates(current_user.id, cards)
+    return review
+
+def rate_answers_service(data, db, current_user):
+    now = datetime.now(timezone.utc)
+    entries = sorted(
+        enumerate(data.items),
+        key=lambda entry: (to_utc(entry[1].reviewed_at) or now, entry[0])
+    )
+    keys = set((item.item_type, item.item_id) for item in data.items)
+    reviews = {}
+    if keys:
+        reviews = {(r.item_type, r.item_id): r for r in db.query(models.UserCardReview).filter(
+            models.UserCardReview.user_id == current_user.id,
+            tuple_(models.UserCardReview.item_type, models.UserCardReview.item_id).in_(keys)
+        )}
+    scheduler = user_scheduler(db, current_user.id)
+    results = [None] * len(data.items)
+    for index, item in entries:
+        result = {"item_type": item.item_type, "item_id": item.item_id, "success": False, "error": None}
+        results[index] = result
+        if item.rating not in [1, 2, 3, 4]:
+            result["error"] = "Invalid rating"
+            continue
+        review = reviews.get((item.item_type, item.item_id))
+        if review is None:
+            result["error"] = "No answer submitted for this card"
+            continue
+        try:
+            apply_rating(review, item.rating, db, to_utc(item.reviewed_at), scheduler)
+        except ValueError as e:
+            result["error"] = str(e)
+            continue
+        result["success"] = True
+    cards = card_updates(reviews.values())
+    publish_due_updates(db, current_user.id, cards)
+    db.commit()
+    due_queues.apply_updates(current_user.id, cards)
+    rated_ids = [r.id for r in reviews.values()]
+    if rated_ids:
+        reloaded = {r.id: r for r in db.query(models.UserCardReview).filter(models.UserCardReview.id.in_(rated_ids))}
+        reviews = {key: reloaded[r.id] for key, r in reviews.items()}
+    for result in results:
+        if result["success"]:
+            result["review"] = reviews[(result["item_type"], result["item_id"])]
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }
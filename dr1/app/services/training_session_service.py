@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from .. import schemas
+from app.database import SessionLocal
+from app.services.training_service import start_training_service, submit_answer_service, rate_answers_service, MAX_TRAINING_COUNT
+
+FLUSH_SIZE = 10
+
+def with_session(func, *args):
+    db = SessionLocal()
+    try:
+        return func(*args, db)
+    finally:
+        db.close()
+
+class TrainingSession:
+    def __init__(self, websocket: WebSocket, user):
+        self.websocket = websocket
+        self.user = user
+        self.questions = []
+        self.pending_ratings = []
+
+    async def send_next_question(self):
+        if self.questions:
+            await self.websocket.send_json({"type": "question", "question": self.questions.pop(0), "remaining": len(self.questions)})
+        else:
+            await self.flush_ratings()
+            await self.websocket.send_json({"type": "done"})
+
+    async def start(self, message):
+        count = min(max(int(message.get("count", 20)), 1), MAX_TRAINING_COUNT)
+        is_review = bool(message.get("is_review", False))
+        order = message.get("order", "due")
+        result = await run_in_threadpool(
+            with_session, lambda db: start_training_service(count, is_review, db, self.user, order)
+        )
+        self.questions = result["questions"]
+        await self.send_next_question()
+
+    async def answer(self, message):
+        data = schemas.TrainingAnswerRequest(**message)
+        db = SessionLocal()
+        try:
+            result = await submit_answer_service(data, db, self.user)
+        finally:
+            await run_in_threadpool(db.close)
+        if result is None:
+            await self.websocket.send_json({"type": "error", "detail": "Item not found or no text found for this item"})
+            return
+        await self.websocket.send_json({"type": "answer_result", "item_type": data.item_type, "item_id": data.item_id, **result})
+
+    async def rate(self, message):
+        item = schemas.TrainingRateAnswerItem(**{**message, "reviewed_at": message.get("reviewed_at") or datetime.now(timezone.utc)})
+        self.pending_ratings.append(item)
+        await self.websocket.send_json({"type": "rate_queued", "item_type": item.item_type, "item_id": item.item_id, "pending": len(self.pending_ratings)})
+        if len(self.pending_ratings) >= FLUSH_SIZE:
+            await self.flush_ratings()
+
+    async def flush_ratings(self, notify=True):
+        if not self.pending_ratings:
+            return
+        data = schemas.TrainingRateAnswersRequest(items=self.pending_ratings)
+        self.pending_ratings = []
+        result = await run_in_threadpool(
+            with_session, lambda db: schemas.TrainingRateAnswersResponse.model_validate(
+                rate_answers_service(data, db, self.user), from_attributes=True
+            )
+        )
+        if notify:
+            await self.websocket.send_json({"type": "rate_results", **result.model_dump(mode="json")})
+
+    async def handle(self, message):
+        message_type = message.pop("type", None)
+        if message_type == "start":
+            await self.start(message)
+        elif message_type == "next":
+            await self.send_next_question()
+        elif message_type == "answer":
+            await self.answer(message)
+        elif message_type == "rate":
+            await self.rate(message)
+        elif message_type == "flush":
+            await self.flush_ratings()
+        else:
+            await self.websocket.send_json({"type": "error", "detail": f"Unknown message type: {message_type}"})
+
+    async def run(self):
+        try:
+            while True:
+                try:
+                    message = await self.websocket.receive_json()
+                    if not isinstance(message, dict):
+                        raise ValueError("Message must be a JSON object")
+                    await self.handle(message)
+                except (ValidationError, TypeError, ValueError) as e:
+                    await self.websocket.send_json({"type": "error", "detail": str(e)})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await self.flush_ratings(notify=False)
@@ -1,7 +1,12 @@
 from sqlalchemy.orm import Session, joinedload
 from .. import models, schemas
+from app.services.phrase_service import refresh_phrase_canonical_text, phrase_ids_for_word
+from app.services.accepted_answer_service import rebuild_accepted_answers, delete_accepted_answers
+from app.services.item_features_service import mark_item_features_stale, group_ids_for
 import logging, os
 
+ANSWER_FIELDS = {"text", "gender", "reflexivity"}
+
 def create_word_service(word: schemas.WordCreate, db: Session) -> models.Word:
     db_word = models.Word(
         text=word.text,
@@ -12,6 +17,8 @@ def create_word_service(word: schemas.WordCreate, db: Session) -> models.Word:
     )
     db.add(db_word)
     db.commit()
+    rebuild_accepted_answers(db, "word", [db_word.id])
+    db.commit()
     db.refresh(db_word)
     return db_word
 
@@ -42,8 +49,14 @@ def update_word_service(word_id: int, word_update: schemas.WordUpdate, db: Sessi
     ).filter(models.Word.id == word_id).first()
     if not db_word:
         return None
-    for key, value in word_update.dict(exclude_unset=True).items():
+    update_data = word_update.dict(exclude_unset=True)
+    for key, value in update_data.items():
         setattr(db_word, key, value)
+    db.flush()
+    if "text" in update_data:
+        refresh_phrase_canonical_text(phrase_ids_for_word(word_id, db), db)
+    if ANSWER_FIELDS & update_data.keys():
+        rebuild_accepted_answers(db, "word", [word_id])
     db.commit()
     db.refresh(db_word)
     return db_word
@@ -52,9 +65,14 @@ def delete_word_service(word_id: int, db: Session):
     word = db.query(models.Word).filter(models.Word.id == word_id).first()
     if not word:
         return False
+    phrase_ids = phrase_ids_for_word(word_id, db)
+    mark_item_features_stale(db, "phrase", phrase_ids)
+    mark_item_features_stale(db, "group", group_ids_for(db, models.SemanticGroupLink.word_id, word_id))
     db.query(models.PhraseComponent).filter(models.PhraseComponent.word_id == word_id).delete()
     db.query(models.SemanticGroupLink).filter(models.SemanticGroupLink.word_id == word_id).delete()
+    delete_accepted_answers(db, "word", word_id)
     db.delete(word)
+    refresh_phrase_canonical_text(phrase_ids, db)
     db.commit()
     return True
 
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import random
+import time
+import httpx
+from app.config import settings
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        return time.monotonic() - self.opened_at >= self.reset_seconds
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logging.warning(f"LLM circuit breaker opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+client = None
+semaphore = None
+breaker = CircuitBreaker(settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_SECONDS)
+
+def get_client():
+    global client, semaphore
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONCURRENCY,
+                max_keepalive_connections=settings.LLM_MAX_CONCURRENCY
+            ),
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=5.0)
+        )
+        semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return client
+
+async def start_http_client():
+    get_client()
+
+async def stop_http_client():
+    global client, semaphore
+    if client is not None:
+        await client.aclose()
+    client = None
+    semaphore = None
+
+async def post_json(url, payload, headers=None, timeout=None):
+    if not breaker.allow():
+        raise CircuitOpenError("LLM upstream is degraded, circuit is open")
+    http = get_client()
+    deadline = time.monotonic() + (timeout or settings.LLM_TIMEOUT_SECONDS)
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            async with semaphore:
+                response = await asyncio.wait_for(http.post(url, json=payload, headers=headers), timeout=remaining)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                response.raise_for_status()
+                breaker.record_success()
+                return response.json()
+            error = httpx.HTTPStatusError(f"Retryable status {response.status_code}", request=response.request, response=response)
+        except httpx.HTTPStatusError:
+            raise
+        except (httpx.TransportError, asyncio.TimeoutError) as e:
+            error = e
+        backoff = settings.LLM_RETRY_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+        if attempt >= settings.LLM_MAX_RETRIES or time.monotonic() + backoff >= deadline:
+            breaker.record_failure()
+            raise error
+        attempt += 1
+        await asyncio.sleep(backoff)
@@ -0,0 +1,25 @@
+import re
+
+WHITESPACE_RE = re.compile(r"\s+")
+UMLAUT_STRIP = str.maketrans({"ä": "a", "ö": "o", "ü": "u"})
+UMLAUT_FOLD = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+def normalize_answer(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", (text or "").strip().lower())
+
+def strip_umlauts(text: str) -> str:
+    return normalize_answer(text).translate(UMLAUT_STRIP).replace("ß", "ss")
+
+def fold_answer(text: str) -> str:
+    return normalize_answer(text).translate(UMLAUT_FOLD)
+
+def edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
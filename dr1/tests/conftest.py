@@ -0,0 +1,51 @@
+import os
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from app import models
+
+@compiles(ARRAY, "sqlite")
+@compiles(JSONB, "sqlite")
+def compile_json(element, compiler, **kw):
+    return "JSON"
+
+TABLES = [
+    models.PartOfSpeech.__table__,
+    models.Word.__table__,
+    models.WordMeaning.__table__,
+    models.WordMeaningExample.__table__,
+    models.Phrase.__table__,
+    models.PhraseComponent.__table__,
+    models.PhraseMeaning.__table__,
+    models.PhraseMeaningExample.__table__,
+    models.EventTicket.__table__,
+]
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine, tables=TABLES)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture
+def statements(db):
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
@@ -0,0 +1,12 @@
+from types import SimpleNamespace
+from app.services.accepted_answer_service import word_variants
+from app.utils.text_normalization import fold_answer
+
+def test_word_variants_are_german_surface_forms_only():
+    meaning = SimpleNamespace(translations=[SimpleNamespace(translation="митися")])
+    word = SimpleNamespace(text="sich waschen", reflexivity=True, gender=None, meanings=[meaning])
+    assert word_variants(word) == {fold_answer("sich waschen"), fold_answer("waschen")}
+
+def test_word_variants_include_article_form():
+    word = SimpleNamespace(text="Mädchen", reflexivity=False, gender="n", meanings=[])
+    assert word_variants(word) == {fold_answer("Mädchen"), fold_answer("das Mädchen")}
@@ -0,0 +1,11 @@
+from app.services import analysis_cache_service as service
+
+def test_memory_hit_does_not_query_the_database(db, statements, monkeypatch):
+    monkeypatch.setattr(service, "pending_hits", {})
+    analysis = {"error_analysis": "Spelling Error", "brief_explanation": "..."}
+    service.memory_cache.set(service.cache_key("Mädchen", "Madchen"), analysis)
+    statements.clear()
+    for _ in range(service.HIT_FLUSH_SIZE - 1):
+        assert service.get_cached_analysis(db, "Mädchen", "Madchen") == analysis
+    assert statements == []
+    assert service.pending_hits[service.cache_key("Mädchen", "Madchen")][0] == service.HIT_FLUSH_SIZE - 1
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+from app.services.due_queue import DueQueueCache, UserDueQueue
+
+NOW = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+class RacingCache(DueQueueCache):
+    def __init__(self, rows, during_load):
+        super().__init__(1000, 3600)
+        self.rows = rows
+        self.during_load = during_load
+
+    def load(self, db, user_id):
+        rows = list(self.rows)
+        self.during_load(self)
+        return UserDueQueue(rows)
+
+def test_updates_published_while_loading_are_applied():
+    past = NOW.timestamp() - 60
+    cache = RacingCache([(past, "word", 1)], lambda c: c.apply_updates(7, [("word", 1, None), ("word", 2, past)]))
+    assert cache.get_due_items(None, 7, 10, NOW) == [("word", 2)]
+    assert cache.get_due_items(None, 7, 10, NOW) == [("word", 2)]
+    assert cache.loading == {}
+
+def test_load_interrupted_by_clear_is_not_cached():
+    past = NOW.timestamp() - 60
+    cache = RacingCache([(past, "word", 1)], lambda c: c.clear())
+    assert cache.get_due_items(None, 7, 10, NOW) == [("word", 1)]
+    assert 7 not in cache.queues
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.services import error_analysis_service as service
+
+FALLBACK = {"error_analysis": "Lexical Choice Error", "brief_explanation": "...", "is_fallback": True}
+
+def patch_analysis(monkeypatch, attempts, analysis):
+    saved = []
+
+    async def analyze(correct_answer, user_answer):
+        return analysis
+
+    monkeypatch.setattr(service, "load_pending_error", lambda error_id: ("Mädchen", "Junge", attempts))
+    monkeypatch.setattr(service, "analyze_error_with_gemini", analyze)
+    monkeypatch.setattr(service, "save_error_analysis", lambda error_id, result: saved.append((error_id, result)))
+    return saved
+
+def test_fallback_analysis_is_retried_before_attempts_run_out(monkeypatch):
+    saved = patch_analysis(monkeypatch, 1, FALLBACK)
+    with pytest.raises(service.AnalysisUnavailable):
+        asyncio.run(service.run_error_analysis(7))
+    assert saved == []
+
+def test_fallback_analysis_is_saved_on_the_last_attempt(monkeypatch):
+    saved = patch_analysis(monkeypatch, service.settings.GEMINI_ANALYSIS_MAX_ATTEMPTS, FALLBACK)
+    asyncio.run(service.run_error_analysis(7))
+    assert saved == [(7, FALLBACK)]
+
+def test_worker_releases_and_schedules_retry_on_fallback(monkeypatch):
+    patch_analysis(monkeypatch, 1, FALLBACK)
+    retries = []
+    monkeypatch.setattr(service, "release_failed_error", lambda error_id: ("pending", 1))
+    monkeypatch.setattr(service, "schedule_retry", lambda error_id, attempts: retries.append((error_id, attempts)))
+
+    async def run_worker():
+        monkeypatch.setattr(service, "queue", asyncio.Queue())
+        service.queue.put_nowait(7)
+        worker = asyncio.create_task(service.analysis_worker())
+        await service.queue.join()
+        worker.cancel()
+
+    asyncio.run(run_worker())
+    assert retries == [(7, 1)]
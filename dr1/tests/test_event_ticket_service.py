@@ -0,0 +1,13 @@
+from app import models
+from app.services.event_ticket_service import issue_event_ticket, redeem_event_ticket
+
+def test_ticket_is_redeemed_once(db):
+    ticket = issue_event_ticket(db, 7)["ticket"]
+    assert db.query(models.EventTicket).one().ticket_hash != ticket
+    assert redeem_event_ticket(db, ticket) == 7
+    assert redeem_event_ticket(db, ticket) is None
+
+def test_expired_ticket_is_rejected(db, monkeypatch):
+    monkeypatch.setattr("app.services.event_ticket_service.settings.SSE_TICKET_TTL_SECONDS", -1)
+    ticket = issue_event_ticket(db, 7)["ticket"]
+    assert redeem_event_ticket(db, ticket) is None
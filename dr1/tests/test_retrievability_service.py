@@ -0,0 +1,14 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from fsrs import Card
+from app.services.retrievability_service import score_cards
+
+def test_retrievability_matches_fsrs_whole_day_elapsed_time():
+    now = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    last_reviews = [now - timedelta(hours=h) for h in (1, 23, 25, 47.5, 24 * 30 + 5)]
+    cards = score_cards({
+        "stability": np.full(len(last_reviews), 3.5),
+        "last_review": np.array([r.timestamp() for r in last_reviews]),
+    }, now)
+    expected = [Card(stability=3.5, last_review=r).get_retrievability(now) for r in last_reviews]
+    assert np.allclose(cards["retrievability"], expected)
@@ -0,0 +1,27 @@
+from datetime import timedelta
+import pytest
+from sqlalchemy import text
+from app import models
+from app.services import studyset_job_service as service
+
+@pytest.fixture
+def jobs(db):
+    db.execute(text(
+        "CREATE TABLE studyset_jobs (id INTEGER PRIMARY KEY, user_id INTEGER, status VARCHAR, study_set_id INTEGER, "
+        "error VARCHAR, started_at DATETIME, claimed_at DATETIME, heartbeat_at DATETIME, finished_at DATETIME)"
+    ))
+    db.execute(text("INSERT INTO studyset_jobs (id, user_id, status) VALUES (1, 7, 'pending')"))
+    db.commit()
+    return db
+
+def test_finish_is_discarded_after_the_job_was_reclaimed(jobs):
+    stale_claim = service.claim_job(jobs, 1)
+    jobs.query(models.StudySetJob).update({models.StudySetJob.status: "pending"})
+    fresh_claim = service.claim_job(jobs, 1) + timedelta(microseconds=1)
+    jobs.query(models.StudySetJob).update({models.StudySetJob.claimed_at: fresh_claim})
+    jobs.commit()
+    assert not service.refresh_lease(jobs, 1, stale_claim)
+    assert not service.finish_job(jobs, 1, stale_claim, {models.StudySetJob.status: "done"})
+    assert service.finish_job(jobs, 1, fresh_claim, {models.StudySetJob.status: "done"})
+    jobs.commit()
+    assert jobs.query(models.StudySetJob.status).scalar() == "done"
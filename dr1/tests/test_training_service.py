@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+import pytest
+from app import models
+from app.services.training_service import build_questions, diagnose_answer_locally
+
+def add_items(db, count):
+    db.add(models.PartOfSpeech(id=1, name="noun"))
+    for i in range(1, count + 1):
+        db.add(models.Word(id=i, text=f"wort{i}", part_of_speech=1))
+        db.add(models.WordMeaning(id=i, word_id=i, meaning=f"слово {i}"))
+        db.add(models.WordMeaningExample(word_meaning_id=i, example_text=f"приклад {i}"))
+        db.add(models.Phrase(id=i))
+        db.add(models.PhraseMeaning(id=i, phrase_id=i, meaning=f"фраза {i}"))
+        db.add(models.PhraseMeaningExample(phrase_meaning_id=i, example_text=f"приклад {i}"))
+    db.commit()
+    db.expunge_all()
+
+def test_build_questions_query_count_does_not_grow_with_items(db, statements):
+    add_items(db, 25)
+    items = [(item_type, i) for i in range(1, 26) for item_type in ("word", "phrase")]
+    statements.clear()
+    questions = build_questions(items, db)
+    assert len(questions) == 50
+    assert questions[0]["part_of_speech_obj"] == {"id": 1, "name": "noun"}
+    assert questions[1]["meanings"] == [{"meaning": "фраза 1", "examples": [{"example_text": "приклад 1"}]}]
+    assert len(statements) == 7
+
+WORD = SimpleNamespace(gender=None, plural_form=None, verb_form2=None, verb_form3=None)
+
+@pytest.mark.parametrize("correct, answer", [
+    ("Hund", "Mund"), ("Haus", "Maus"), ("gehen", "sehen"), ("in", "im"), ("ab", "an"), ("Bein", "Sein"),
+])
+def test_short_words_are_not_spelling_errors(correct, answer):
+    assert diagnose_answer_locally(WORD, "word", correct, answer) is None
+
+@pytest.mark.parametrize("correct, answer, explanation", [
+    ("Mädchen", "Madchen", "умлаут"),
+    ("Mädchen", "Maedchen", "ae/oe/ue"),
+    ("Straße", "Strasse", "ß, а не ss"),
+    ("zuhause", "zu hause", "пробіли"),
+    ("Schmetterling", "Schmeterling", "Орфографічна"),
+])
+def test_spelling_errors(correct, answer, explanation):
+    analysis = diagnose_answer_locally(WORD, "word", correct, answer)
+    assert analysis["error_analysis"] == "Spelling Error"
+    assert explanation in analysis["brief_explanation"]
+
+def test_whitespace_only_difference_is_not_an_umlaut_error():
+    assert diagnose_answer_locally(WORD, "phrase", "Guten  Morgen", "guten morgen") is None
@@ -0,0 +1,43 @@
+from app import models, schemas
+from app.services import phrase_service, word_service
+
+def test_editing_word_text_refreshes_phrase_canonical_text(db, monkeypatch):
+    monkeypatch.setattr(phrase_service, "rebuild_accepted_answers", lambda *args: None)
+    monkeypatch.setattr(word_service, "rebuild_accepted_answers", lambda *args: None)
+    db.add_all([models.Word(id=1, text="guten"), models.Word(id=2, text="Morgen"), models.Phrase(id=1)])
+    db.add_all([
+        models.PhraseComponent(phrase_id=1, word_id=1, order=0),
+        models.PhraseComponent(phrase_id=1, word_id=2, order=1),
+    ])
+    db.flush()
+    phrase_service.refresh_phrase_canonical_text([1], db)
+    db.commit()
+
+    word_service.update_word_service(2, schemas.WordUpdate(text="Abend"), db)
+
+    db.expire_all()
+    phrase = db.query(models.Phrase).filter(models.Phrase.id == 1).one()
+    assert phrase.canonical_text == "guten Abend"
+    assert phrase.canonical_text_normalized == "guten abend"
+
+def test_phrase_accepted_answers_are_rebuilt_from_new_word_text(db, monkeypatch):
+    rebuilt = []
+
+    def record_rebuild(db, item_type, item_ids):
+        rows = db.query(models.PhraseComponent.phrase_id, models.Word.text).join(
+            models.Word, models.Word.id == models.PhraseComponent.word_id
+        ).order_by(models.PhraseComponent.order)
+        rebuilt.append((item_type, [text for _, text in rows]))
+
+    monkeypatch.setattr(phrase_service, "rebuild_accepted_answers", record_rebuild)
+    monkeypatch.setattr(word_service, "rebuild_accepted_answers", lambda *args: None)
+    db.add_all([models.Word(id=1, text="guten"), models.Word(id=2, text="Morgen"), models.Phrase(id=1)])
+    db.add_all([
+        models.PhraseComponent(phrase_id=1, word_id=1, order=0),
+        models.PhraseComponent(phrase_id=1, word_id=2, order=1),
+    ])
+    db.commit()
+
+    word_service.update_word_service(2, schemas.WordUpdate(text="Abend"), db)
+
+    assert rebuilt == [("phrase", ["guten", "Abend"])]